@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Local stand-in for the NATS briefing website. Serves the login page,
+# the area briefing form and a synthetic PIB result, with the same form
+# and field ids as the real site.
+
+import argparse
+import collections
+import datetime
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import secrets
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from navplot.navplot import AREA_BRIEF_PATH, LOGIN_PATH
+from synthetic import pib_html
+
+BASE_PATH = "/fwf-nats"
+
+LOGIN_PAGE = """<!DOCTYPE html><html><body>
+<form id="login:mainForm" method="post" action="{action}">
+<input type="hidden" name="javax.faces.ViewState" value="login">
+<input type="text" name="login:mainForm:j_username_input">
+<input type="password" name="login:mainForm:j_password">
+<input type="submit" name="login:mainForm:loginButton" value="Login">
+</form>{message}</body></html>"""
+
+AREA_PAGE = """<!DOCTYPE html><html><body>
+<form id="mainPage:mainForm" method="post" action="{action}">
+<input type="hidden" name="javax.faces.ViewState" value="{view_state}">
+<input type="text" name="mainPage:mainForm:fir:fir:fir_input_input">
+<input type="submit" name="mainPage:mainForm:fir:fir:fir_uibsm-ad1" value="Add">
+<ul class="firList">{firs}</ul>
+<input type="text" name="mainPage:mainForm:startDateSelected:startDateSelected_date_input">
+<input type="text" name="mainPage:mainForm:startDateSelected:startDateSelected_time_input">
+<input type="text" name="mainPage:mainForm:endDateSelected:endDateSelected_date_input">
+<input type="text" name="mainPage:mainForm:endDateSelected:endDateSelected_time_input">
+<input type="submit" name="mainPage:mainForm:pibgenerate" value="Generate">
+</form></body></html>"""
+
+
+# -----------------------------------------------------------------------
+class FakeNats:
+    def __init__(
+        self,
+        notams=500,
+        date=None,
+        latency=0.0,
+        pib_latency=0.0,
+        seed=0,
+        users=None,
+        header_firs=True,
+        host="127.0.0.1",
+        port=0,
+    ):
+        self.notams = notams
+        self.date = date or datetime.datetime.now(datetime.UTC).date()
+        self.latency = latency
+        self.pib_latency = pib_latency
+        self.seed = seed
+        self.users = users
+
+        # Whether the PIB result header names the FIRs
+        self.header_firs = header_firs
+
+        # Session id -> {"firs": [...], "view_state": ...}
+        self.sessions = {}
+        self.hits = collections.Counter()
+        self.lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Forget all logged in sessions
+    def expire_sessions(self):
+        with self.lock:
+            self.sessions.clear()
+
+
+# -----------------------------------------------------------------------
+def _handler(nats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self._path()
+            nats.hits["GET " + path] += 1
+            time.sleep(nats.latency)
+
+            if path == LOGIN_PATH:
+                self._login_page()
+            elif path == AREA_BRIEF_PATH:
+                session = self._session()
+                if session is None:
+                    self._redirect(LOGIN_PATH)
+                else:
+                    self._area_page(session)
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            path = self._path()
+            nats.hits["POST " + path] += 1
+            time.sleep(nats.latency)
+
+            length = int(self.headers.get("Content-Length", 0))
+            form = {
+                k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()
+            }
+
+            if path == LOGIN_PATH:
+                self._login(form)
+            elif path == AREA_BRIEF_PATH:
+                session = self._session()
+                if session is None:
+                    self._redirect(LOGIN_PATH)
+                elif form.get("javax.faces.ViewState") != session["view_state"]:
+                    self._send("<html><body>View expired</body></html>")
+                elif "mainPage:mainForm:pibgenerate" in form:
+                    self._pib(session, form)
+                else:
+                    fir = form.get("mainPage:mainForm:fir:fir:fir_input_input")
+                    if fir and fir not in session["firs"]:
+                        session["firs"].append(fir)
+                    self._area_page(session)
+            else:
+                self.send_error(404)
+
+        def _path(self):
+            path = urlsplit(self.path).path
+            return path.removeprefix(BASE_PATH)
+
+        def _session(self):
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            if "JSESSIONID" not in cookie:
+                return None
+
+            with nats.lock:
+                return nats.sessions.get(cookie["JSESSIONID"].value)
+
+        def _send(self, body, headers=()):
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for header in headers:
+                self.send_header(*header)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _redirect(self, path):
+            self.send_response(302)
+            self.send_header("Location", BASE_PATH + path)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _login_page(self, message=""):
+            self._send(
+                LOGIN_PAGE.format(action=BASE_PATH + LOGIN_PATH, message=message)
+            )
+
+        def _login(self, form):
+            user = form.get("login:mainForm:j_username_input")
+            password = form.get("login:mainForm:j_password")
+            if nats.users is not None and nats.users.get(user) != password:
+                self._login_page("<p>Invalid credentials</p>")
+                return
+
+            id = secrets.token_hex(16)
+            with nats.lock:
+                nats.sessions[id] = {"firs": [], "view_state": secrets.token_hex(8)}
+
+            cookie = ("Set-Cookie", f"JSESSIONID={id}; Path={BASE_PATH}; HttpOnly")
+            self._send("<html><body>Logged in</body></html>", [cookie])
+
+        def _area_page(self, session):
+            firs = "".join(f"<li>{fir}</li>" for fir in session["firs"])
+            self._send(
+                AREA_PAGE.format(
+                    action=BASE_PATH + AREA_BRIEF_PATH,
+                    view_state=session["view_state"],
+                    firs=firs,
+                )
+            )
+
+        def _pib(self, session, form):
+            # Generation time scales with the number of FIRs
+            time.sleep(nats.pib_latency * len(session["firs"]))
+
+            prefix = "mainPage:mainForm:"
+            date_from = datetime.date.fromisoformat(
+                form[prefix + "startDateSelected:startDateSelected_date_input"]
+            )
+            date_to = datetime.date.fromisoformat(
+                form[prefix + "endDateSelected:endDateSelected_date_input"]
+            )
+            page = pib_html(
+                nats.notams,
+                nats.date,
+                nats.seed,
+                session["firs"],
+                date_from,
+                date_to,
+            )
+            if not nats.header_firs:
+                page = page.replace(
+                    f"<p>Area briefing {' '.join(session['firs'])}</p>", ""
+                )
+
+            self._send(page)
+
+    return Handler
+
+
+def fake_nats_cli():
+    parser = argparse.ArgumentParser(description="Fake NATS briefing server")
+    parser.add_argument("--port", "-p", type=int, default=8080)
+    parser.add_argument("--notams", "-n", type=int, default=500)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="delay per request (s)"
+    )
+    parser.add_argument(
+        "--pib-latency",
+        type=float,
+        default=0.0,
+        help="extra delay for PIB generation, per FIR (s)",
+    )
+    args = parser.parse_args()
+
+    nats = FakeNats(
+        args.notams,
+        latency=args.latency,
+        pib_latency=args.pib_latency,
+        port=args.port,
+    )
+    print(f"Serving on {nats.url}")
+    try:
+        nats.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    fake_nats_cli()
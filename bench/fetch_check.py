@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Check the NOTAM fetch against the fake NATS server, e.g.
+#
+#   bench/fetch_check.py            # all checks
+#   bench/fetch_check.py sessions   # stored session resume and expiry
+#   bench/fetch_check.py concurrent # serial and concurrent fetches match
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+
+from navplot.navplot import AREA_BRIEF_PATH, FIRS, LOGIN_PATH, fetch_pib, get_notams
+from navplot.session import SessionStore
+from fake_nats import FakeNats
+
+USER = "user"
+PASSWORD = "password"
+
+
+class Checker:
+    def __init__(self):
+        self.failures = []
+
+    def check(self, name, ok, detail=""):
+        print(f"{'ok' if ok else 'FAIL':4}  {name}" + (f": {detail}" if detail else ""))
+        if not ok:
+            self.failures.append(name)
+
+
+def logins(nats):
+    return nats.hits["POST " + LOGIN_PATH]
+
+
+def posts(nats):
+    return nats.hits["POST " + AREA_BRIEF_PATH]
+
+
+def ids(notams):
+    return {n.id for n in notams}
+
+
+def header(response):
+    return response.soup.find("div", class_="uibs-pib-result-header").get_text()
+
+
+# A fresh login doesn't depend on the PIB header naming the FIRs
+def check_fresh(checker, date):
+    with FakeNats(date=date, header_firs=False) as nats:
+        notams, _ = get_notams(USER, PASSWORD, date, date, base_url=nats.url)
+        checker.check("fresh login", len(notams) > 0, f"{len(notams)} NOTAMs")
+
+
+# Stored sessions are resumed, and replaced by a new login when they expire
+def check_sessions(checker, date):
+    with (
+        FakeNats(date=date) as nats,
+        tempfile.TemporaryDirectory() as tmpdir,
+    ):
+        store = SessionStore(os.path.join(tmpdir, "sessions.json"))
+
+        def fetch(firs=FIRS, store=store):
+            return fetch_pib(
+                USER, PASSWORD, firs, date, date, nats.url, session_store=store
+            )
+
+        expected = ids(get_notams(USER, PASSWORD, date, date, base_url=nats.url)[0])
+        start = logins(nats)
+
+        fetch()
+        checker.check("first fetch logs in", logins(nats) == start + 1)
+
+        n = posts(nats)
+        fetch()
+        checker.check(
+            "resume stored session",
+            logins(nats) == start + 1 and posts(nats) == n + 1,
+            f"{posts(nats) - n} requests",
+        )
+
+        response = fetch(("EGTT",))
+        checker.check(
+            "other FIRs get their own session",
+            logins(nats) == start + 2 and "EGPX" not in header(response),
+        )
+
+        nats.expire_sessions()
+        notams, _ = get_notams(
+            USER, PASSWORD, date, date, base_url=nats.url, session_store=store
+        )
+        checker.check(
+            "expired session logs in again",
+            logins(nats) == start + 3 and ids(notams) == expected,
+        )
+
+        with nats.lock:
+            for session in nats.sessions.values():
+                session["view_state"] = "expired"
+        fetch()
+        checker.check("expired view state logs in again", logins(nats) == start + 4)
+
+        fetch(store=SessionStore(store.filename, max_idle=datetime.timedelta(0)))
+        checker.check("idle session logs in again", logins(nats) == start + 5)
+
+    # Resumed sessions are only trusted if the header names the FIRs
+    with (
+        FakeNats(date=date, header_firs=False) as nats,
+        tempfile.TemporaryDirectory() as tmpdir,
+    ):
+        store = SessionStore(os.path.join(tmpdir, "sessions.json"))
+        for _ in range(2):
+            fetch_pib(USER, PASSWORD, FIRS, date, date, nats.url, session_store=store)
+        checker.check("unconfirmed session logs in again", logins(nats) == 2)
+
+
+# Concurrent fetches, one per FIR (and day), get the same NOTAMs as a
+# serial fetch, each only once
+def check_concurrent(checker, date):
+    date_to = date + datetime.timedelta(days=1)
+    with FakeNats(date=date) as nats:
+
+        def fetch(**kwargs):
+            notams, _ = get_notams(
+                USER, PASSWORD, date, date_to, base_url=nats.url, **kwargs
+            )
+            return notams
+
+        serial = fetch()
+        checker.check("serial fetch", len(serial) > 0, f"{len(serial)} NOTAMs")
+
+        for name, kwargs in (
+            ("concurrent fetch", {"concurrent": True}),
+            ("concurrent fetch by day", {"concurrent": True, "split_days": True}),
+        ):
+            notams = fetch(**kwargs)
+            checker.check(
+                name,
+                ids(notams) == ids(serial) and len(notams) == len(ids(notams)),
+                f"{len(notams)} NOTAMs",
+            )
+
+
+CHECKS = {
+    "fresh": check_fresh,
+    "sessions": check_sessions,
+    "concurrent": check_concurrent,
+}
+
+
+def fetch_check_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "checks",
+        nargs="*",
+        metavar="CHECK",
+        help=f"checks to run, from {', '.join(CHECKS)} (default: all)",
+    )
+    args = parser.parse_args()
+    for name in args.checks:
+        if name not in CHECKS:
+            parser.error(f"unknown check {name}")
+
+    date = datetime.datetime.now(datetime.UTC).date()
+    checker = Checker()
+    for name in args.checks or CHECKS:
+        CHECKS[name](checker, date)
+
+    return not checker.failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if fetch_check_cli() else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measure cold import time of navplot entry points with -X importtime, and
+# check that the network, parsing and PDF libraries aren't imported until
+# they are needed.
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Libraries which should only be imported when used
+HEAVY = ("mechanicalsoup", "requests", "bs4", "lxml", "reportlab")
+
+# (name, statement, libraries the statement is allowed to import)
+CASES = [
+    ("import navplot", "import navplot", ()),
+    (
+        "digest",
+        "import datetime, navplot.navplot as n; "
+        "n.briefing_digest([], '', datetime.date.today(), (50.2, -5.0, 6.5))",
+        (),
+    ),
+    ("render", "import navplot.notamdoc", ("reportlab",)),
+    ("parse", "import navplot.navplot as n; n._bs4()", ("bs4", "lxml")),
+]
+
+CHECK = "; import sys; print(' '.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+# Run statement in a fresh interpreter, returns the total import time (s)
+# and the heavy libraries loaded
+def run_case(stmt):
+    code = stmt + CHECK.format(heavy=HEAVY)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Sum self times of all modules, excluding the interpreter start up
+    # (site) which is the same for every case
+    total = 0
+    site = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[12:].split("|")
+        total += int(self_us)
+        if name.strip() == "site":
+            site = int(cumulative_us)
+
+    return (total - site) / 1e6, result.stdout.split()
+
+
+def import_bench_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="JSON output")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="fail if 'import navplot' takes longer (seconds)",
+    )
+    args = parser.parse_args()
+
+    ok = True
+    results = {}
+    for name, stmt, allowed in CASES:
+        times = []
+        for _ in range(args.repeat):
+            t, loaded = run_case(stmt)
+            times.append(t)
+
+        unexpected = [m for m in loaded if m not in allowed]
+        if unexpected:
+            ok = False
+
+        results[name] = {"seconds": statistics.median(times), "unexpected": unexpected}
+
+    if args.budget is not None and results["import navplot"]["seconds"] > args.budget:
+        ok = False
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for name, r in results.items():
+            extra = (
+                f"  UNEXPECTED: {' '.join(r['unexpected'])}" if r["unexpected"] else ""
+            )
+            print(f"{name:20s} {r['seconds'] * 1000:9.1f} ms{extra}")
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if import_bench_cli() else 1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Time the briefing layout for increasing numbers of NOTAMs. All the
+# NOTAMs are listed (there is no date filtering) so the time is dominated
+# by the NOTAM list pages, which should scale linearly.
+
+import argparse
+import datetime
+import io
+import sys
+import timeit
+
+import bs4
+
+from navplot import get_map_data
+from navplot.navplot import parse_soup
+from navplot.notamdoc import format_doc
+from navplot.rules import classify
+from synthetic import pib_html
+
+SOUTH = (50.2, -5.0, 6.5)
+
+
+def layout_bench_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "sizes",
+        nargs="*",
+        type=int,
+        default=[500, 1000, 2000, 5000],
+        help="NOTAM counts",
+    )
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="fail if time per NOTAM grows by more than this factor",
+    )
+    args = parser.parse_args()
+
+    date = datetime.date.today()
+    map_data = get_map_data()
+
+    per_notam = []
+    for n in args.sizes:
+        html = pib_html(
+            n,
+            date,
+            date_from=date - datetime.timedelta(days=30),
+            date_to=date + datetime.timedelta(days=30),
+        )
+        notams = parse_soup(bs4.BeautifulSoup(html, "lxml"))
+        local, area, boring, coords = classify(notams)
+
+        def render():
+            buf = io.BytesIO()
+            format_doc(
+                buf, local, area, boring, coords, "Header", date, SOUTH, map_data
+            )
+            return buf
+
+        pdf = render()
+        t = min(timeit.repeat(render, number=1, repeat=args.repeat))
+        per_notam.append(t / len(notams))
+        print(
+            f"{len(notams):6d} NOTAMs  {t * 1000:9.1f} ms  "
+            f"{t / len(notams) * 1e6:7.1f} us/NOTAM  "
+            f"{len(pdf.getvalue()) // 1024:6d} KB"
+        )
+
+    return max(per_notam) <= args.tolerance * min(per_notam)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if layout_bench_cli() else 1)
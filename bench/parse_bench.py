@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare parse_soup with parse_soup_search on synthetic PIBs. Checks
+# both parsers produce the same NOTAMs and reports the time for each.
+
+import argparse
+import datetime
+import sys
+import timeit
+
+import bs4
+
+from navplot.navplot import parse_soup, parse_soup_search
+from synthetic import pib_html
+
+
+def parse_bench_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "sizes", nargs="*", type=int, default=[100, 1000, 4000], help="NOTAM counts"
+    )
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    args = parser.parse_args()
+
+    date = datetime.date.today()
+    ok = True
+    for n in args.sizes:
+        # Wide date window so the whole corpus is included
+        html = pib_html(
+            n,
+            date,
+            date_from=date - datetime.timedelta(days=30),
+            date_to=date + datetime.timedelta(days=30),
+        )
+        soup = bs4.BeautifulSoup(html, "lxml")
+
+        search = parse_soup_search(soup)
+        single = parse_soup(soup)
+        if single != search:
+            print(f"{n}: parsers differ")
+            ok = False
+
+        t_search = min(
+            timeit.repeat(lambda: parse_soup_search(soup), number=1, repeat=args.repeat)
+        )
+        t_single = min(
+            timeit.repeat(lambda: parse_soup(soup), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{n:6d} NOTAMs  search {t_search * 1000:8.1f} ms  "
+            f"single-pass {t_single * 1000:8.1f} ms  "
+            f"speedup {t_search / t_single:4.1f}x"
+        )
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if parse_bench_cli() else 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Time each stage of the briefing pipeline against the fake NATS server
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+import mechanicalsoup
+
+from navplot import make_briefing
+from navplot.navplot import FIRS, add_fir, generate_pib, login, parse_pib
+from fake_nats import FakeNats
+
+SOUTH = (50.2, -5.0, 6.5)
+NORTH = (53.0, -6.0, 6.0)
+
+
+class Timer:
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.stages.append((name, time.perf_counter() - start))
+
+
+def run_pipeline(nats, outdir, date):
+    timer = Timer()
+    tomorrow = date + datetime.timedelta(days=1)
+
+    browser = mechanicalsoup.StatefulBrowser()
+    with timer.stage("login"):
+        login(browser, "user", "password", nats.url)
+
+    for fir in FIRS:
+        with timer.stage(f"add_fir {fir}"):
+            add_fir(browser, fir)
+
+    with timer.stage("generate_pib"):
+        response = generate_pib(browser, date, tomorrow)
+
+    with timer.stage("parse_pib"):
+        notams, hdr = parse_pib(response.soup)
+
+    for day, dt in (("today", date), ("tomorrow", tomorrow)):
+        for extent, mapinfo in (("south", SOUTH), ("north", NORTH)):
+            name = f"{day}_{extent}"
+            with timer.stage(f"make_briefing {name}"):
+                filename = os.path.join(outdir, f"{name}.pdf")
+                make_briefing(filename, notams, hdr, dt, mapinfo)
+
+    return len(notams), timer.stages
+
+
+def pipeline_bench_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notams", "-n", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--pib-latency", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="JSON output")
+    parser.add_argument(
+        "--budget", type=float, help="fail if total time exceeds (seconds)"
+    )
+    args = parser.parse_args()
+
+    date = datetime.datetime.now(datetime.UTC).date()
+    with FakeNats(
+        args.notams, date, latency=args.latency, pib_latency=args.pib_latency
+    ) as nats:
+        with tempfile.TemporaryDirectory() as outdir:
+            count, stages = run_pipeline(nats, outdir, date)
+
+    total = sum(t for _, t in stages)
+    if args.json:
+        result = {"notams": count, "stages": dict(stages), "total": total}
+        print(json.dumps(result))
+    else:
+        print(f"{count} NOTAMs")
+        for name, t in stages:
+            print(f"{name:30s} {t * 1000:9.1f} ms")
+        print(f"{'total':30s} {total * 1000:9.1f} ms")
+
+    return args.budget is None or total <= args.budget
+
+
+if __name__ == "__main__":
+    sys.exit(0 if pipeline_bench_cli() else 1)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Time, peak memory and PDF size of each pipeline stage for synthetic
+# corpora of multiples of a normal day's NOTAMs, e.g. a 100x exercise:
+#
+#   bench/scaling_bench.py 1 10 100 --scenario exercise --save base.json
+#   bench/scaling_bench.py 1 10 100 --scenario exercise --baseline base.json
+#
+# Peak memory is the peak Python allocation (tracemalloc) during the stage,
+# measured in a separate untimed run.
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import bs4
+
+from navplot import get_map_data, make_briefing
+from navplot.dateindex import DateIndex
+from navplot.instrument import peak_rss_kb
+from navplot.navplot import filter_notams, parse_pib
+from navplot.notamdoc import typeset_text_pages
+from navplot.rules import DEFAULT_RULESET, classify
+from navplot.spatial import SpatialIndex
+from synthetic import NORMAL_DAY, SCENARIOS, pib_html
+
+SOUTH = (50.2, -5.0, 6.5)
+
+STAGES = ("html", "parse", "filter", "date_index", "classify", "text", "map")
+
+# Allowed change from the baseline, on top of the tolerance, so stages
+# taking a few milliseconds don't fail on timing noise
+NOISE = {"seconds": 0.01, "peak_kb": 64, "pdf_kb": 0}
+
+
+# Run the pipeline stages on a PIB page, returns {stage: (function, result)}
+# with each stage's inputs taken from the earlier results
+def pipeline(page, date, map_data):
+    stages = {}
+
+    def run(name, fn):
+        stages[name] = (fn, fn())
+        return stages[name][1]
+
+    soup = run("html", lambda: bs4.BeautifulSoup(page, "lxml"))
+    notams, hdr = run("parse", lambda: parse_pib(soup))
+    DEFAULT_RULESET.apply(notams)
+
+    run("filter", lambda: filter_notams(notams, date))
+    index = run("date_index", lambda: DateIndex(notams))
+    classified = run("classify", lambda: classify(filter_notams(index, date)))
+
+    _, area_notams, boring_notams, _ = classified
+    text_pages = run("text", lambda: typeset_text_pages(area_notams, boring_notams))
+
+    spatial_index = SpatialIndex(notams)
+    run(
+        "map",
+        lambda: make_briefing(
+            None,
+            index,
+            hdr,
+            date,
+            SOUTH,
+            map_data=map_data,
+            spatial_index=spatial_index,
+            classified=classified,
+            text_pages=text_pages,
+        ),
+    )
+
+    return stages
+
+
+# Time (best of repeat) and peak memory of each stage
+def measure(n, scenario, repeat, date, map_data):
+    page = pib_html(n, date, scenario=scenario)
+    stages = pipeline(page, date, map_data)
+
+    results = {}
+    for name in STAGES:
+        fn, result = stages[name]
+        seconds = min(timeit.repeat(fn, number=1, repeat=repeat))
+
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {"seconds": round(seconds, 6), "peak_kb": peak // 1024}
+        if name == "map":
+            results[name]["pdf_kb"] = len(result) // 1024
+
+    results["notams"] = len(stages["parse"][1][0])
+    return results
+
+
+# Stages slower, using more memory or making a bigger PDF than tolerance
+# times the baseline
+def regressions(results, baseline, tolerance):
+    found = []
+    for size, stages in results.items():
+        for name in STAGES:
+            old = baseline.get(size, {}).get(name)
+            if old is None:
+                continue
+
+            new = stages[name]
+            for key, noise in NOISE.items():
+                if key in old and new[key] > tolerance * old[key] + noise:
+                    found.append(f"{size} {name} {key}: {old[key]} -> {new[key]}")
+
+    return found
+
+
+def scaling_bench_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "multiples",
+        nargs="*",
+        type=int,
+        default=[1, 10, 100],
+        help="corpus sizes, as multiples of a normal day",
+    )
+    parser.add_argument(
+        "--day",
+        type=int,
+        default=NORMAL_DAY,
+        help="NOTAMs in a normal day (default: %(default)s)",
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="normal")
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="JSON output")
+    parser.add_argument("--save", metavar="PATH", help="save results as baseline")
+    parser.add_argument(
+        "--baseline", metavar="PATH", help="compare with saved baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="fail if a stage is slower or bigger than this times the baseline",
+    )
+    args = parser.parse_args()
+
+    date = datetime.date.today()
+    map_data = get_map_data()
+
+    results = {}
+    for m in args.multiples:
+        results[f"{m}x"] = measure(
+            m * args.day, args.scenario, args.repeat, date, map_data
+        )
+
+    report = {
+        "scenario": args.scenario,
+        "day": args.day,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "peak_rss_kb": peak_rss_kb(),
+        "results": results,
+    }
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"{'size':>6}  {'stage':10}  {'ms':>9}  {'us/NOTAM':>8}  {'peak MB':>8}")
+        for size, stages in results.items():
+            for name in STAGES:
+                r = stages[name]
+                print(
+                    f"{size:>6}  {name:10}  {r['seconds'] * 1000:9.1f}  "
+                    f"{r['seconds'] / stages['notams'] * 1e6:8.1f}  "
+                    f"{r['peak_kb'] / 1024:8.1f}"
+                )
+            print(
+                f"{size:>6}  {stages['notams']} NOTAMs, {stages['map']['pdf_kb']} KB PDF"
+            )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        if (baseline["scenario"], baseline["day"]) != (args.scenario, args.day):
+            print("baseline is for a different corpus", file=sys.stderr)
+            return False
+
+        found = regressions(results, baseline["results"], args.tolerance)
+        for r in found:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return not found
+
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if scaling_bench_cli() else 1)
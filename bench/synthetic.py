@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Synthetic NATS pre-flight information bulletin (PIB) generator. Makes
+# PIB result pages (as served by fake_nats.py), Notam records or briefing
+# snapshots, for a normal day or scaled up, e.g.
+#
+#   bench/synthetic.py -n 30000 --scenario exercise --snapshot DIR
+
+import argparse
+import datetime
+import html
+import random
+
+from navplot.navplot import FROM_RE, LEVELS_RE, SCHEDULE_RE, TO_RE, QGroupRe
+from navplot.notam import Notam
+
+# Q-codes by family, (code, subject)
+QCODES = {
+    "R": [
+        ("QRDCA", "DANGER AREA ACTIVATED"),
+        ("QRRCA", "RESTRICTED AREA ACTIVATED"),
+        ("QRTCA", "TEMPORARY RESTRICTED AREA ACTIVATED"),
+        ("QRPCA", "PROHIBITED AREA ACTIVATED"),
+        ("QROLT", "OVERFLIGHT RESTRICTION"),
+    ],
+    "W": [
+        ("QWALW", "AIR DISPLAY WILL TAKE PLACE"),
+        ("QWBLW", "AEROBATICS WILL TAKE PLACE"),
+        ("QWGLW", "GLIDER FLYING WILL TAKE PLACE"),
+        ("QWMLW", "MISSILE, GUN OR ROCKET FIRING WILL TAKE PLACE"),
+        ("QWPLW", "PARACHUTE DROPPING EXERCISE WILL TAKE PLACE"),
+        ("QWRLW", "RELEASE OF RADIOACTIVE MATERIALS OR TOXIC CHEMICALS"),
+        ("QWULW", "UNMANNED AIRCRAFT WILL TAKE PLACE"),
+        ("QWELW", "EXERCISES WILL TAKE PLACE"),
+        ("QWLLW", "KITE FLYING WILL TAKE PLACE"),
+    ],
+    "A": [
+        ("QACCA", "CTZ ACTIVATED"),
+        ("QAECA", "CTA ACTIVATED"),
+        ("QATCA", "TMA ACTIVATED"),
+        ("QAZCS", "ATZ INSTALLED"),
+        ("QARLC", "ATS ROUTE CLOSED"),
+        ("QAFXX", "FIR"),
+    ],
+}
+
+# Q-line traffic/purpose/scope by family
+QUALIFIERS = {
+    "R": ("IV/BO/W", "IV/BO/W", "IV/NBO/W", "V/BO/W"),
+    "W": ("IV/BO/W", "IV/BO/W", "IV/M/W", "V/M/W"),
+    "A": ("IV/NBO/AE", "IV/NBO/A", "I/NBO/E"),
+}
+
+# Q-code family weights (R, W, A) and number of activity centres NOTAMs
+# are clustered around (0 for none), e.g. an exercise adds many firing
+# and exercise warnings over a few ranges, an event day adds many
+# temporary restrictions around the venues
+SCENARIOS = {
+    "normal": ((4, 5, 1), 0),
+    "exercise": ((2, 8, 1), 4),
+    "event": ((8, 2, 1), 12),
+}
+
+# Number of NOTAMs in a normal day's briefing
+NORMAL_DAY = 300
+
+FIRS = ("EGTT", "EGPX")
+FIR_LATS = {"EGTT": (49.9, 55.5), "EGPX": (54.5, 60.8)}
+SCHEDULES = ("0900-1700", "DAILY 0800-1800", "SAT SUN 1000-SS", "MON-FRI 0600-2200")
+UAS_TEXT = ("ACTIVE FOR UAS ONLY", "INSTALLED FOR UAS ONLY")
+
+
+# -----------------------------------------------------------------------
+# Generate the text fields for a random NOTAM. If centres are given the
+# NOTAM is placed near one of them
+def notam_fields(rng, date, fir, family_weights=(4, 5, 1), centres=()):
+    family = rng.choices("RWA", family_weights)[0]
+    qcode, subject = rng.choice(QCODES[family])
+
+    if centres:
+        lat, lon = rng.choice(centres)
+        lat = min(max(lat + rng.gauss(0, 0.2), FIR_LATS[fir][0]), FIR_LATS[fir][1])
+        lon = min(max(lon + rng.gauss(0, 0.3), -8.0), 1.8)
+    else:
+        lat = rng.uniform(*FIR_LATS[fir])
+        lon = rng.uniform(-8.0, 1.8)
+    radius = rng.choice((1, 1, 2, 2, 3, 5, 5, 8, 10, 15, 25, 40, 60, 120, 999))
+    centre = "%02d%02d%s%03d%02d%s" % (
+        int(lat),
+        int(lat % 1 * 60),
+        "N",
+        int(abs(lon)),
+        int(abs(lon) % 1 * 60),
+        "W" if lon < 0 else "E",
+    )
+    lower = rng.choice((0, 0, 0, 10, 20, 50))
+    upper = rng.choice((20, 40, 50, 100, 195, 660, 999))
+    upper = max(upper, lower + 10)
+
+    start = datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(
+        days=rng.randint(-20, 2), minutes=rng.randrange(0, 24 * 60, 15)
+    )
+    if rng.random() < 0.1:
+        end = None
+        end_str = "PERM"
+    else:
+        end = start + datetime.timedelta(minutes=rng.randrange(60, 30 * 24 * 60, 15))
+        end_str = f"{end:%y%m%d%H%M}"
+        if rng.random() < 0.1:
+            end_str += " EST"
+
+    fields = {
+        "fir": fir,
+        "start": start,
+        "end": end,
+        "Q": (
+            f"Q){fir}/{qcode}/{rng.choice(QUALIFIERS[family])}/"
+            f"{lower:03d}/{upper:03d}/{centre}{radius:03d}"
+        ),
+        "BC": f"B){start:%y%m%d%H%M} C){end_str}",
+    }
+
+    if rng.random() < 0.3:
+        fields["D"] = f"D){rng.choice(SCHEDULES)}"
+
+    text = f"{subject} WI {radius}NM RADIUS OF {centre[:5]} {centre[5:]}."
+    if family == "R" and rng.random() < 0.1:
+        text += " " + rng.choice(UAS_TEXT) + "."
+    text += " CONTACT 01234 567890 FOR INFORMATION."
+    fields["E"] = f"E){text}"
+
+    if rng.random() < 0.7:
+        lower_text = rng.choice(("SFC", "GND")) if lower == 0 else f"FL{lower:03d}"
+        if upper > 60 and rng.random() < 0.5:
+            upper_text = f"FL{upper:03d}"
+        else:
+            upper_text = f"{upper * 100}FT AMSL"
+        fields["FG"] = f"F){lower_text} G){upper_text}"
+
+    return fields
+
+
+# -----------------------------------------------------------------------
+# HTML table for one NOTAM
+def notam_html(id, fields):
+    rows = [fields["Q"], fields["BC"]]
+    if "D" in fields:
+        rows.append(fields["D"])
+    rows.append(fields["E"])
+    if "FG" in fields:
+        rows.append(fields["FG"])
+
+    cells = "".join(f"<tr><td>{html.escape(r)}</td></tr>" for r in rows)
+    return (
+        f'<tr class="notamRow"><td class="notamId">{id}</td>'
+        f'<td><table class="notamTable">{cells}</table></td></tr>'
+    )
+
+
+# -----------------------------------------------------------------------
+# Number of NOTAMs for each FIR when n are split over all FIRs
+def fir_counts(n):
+    counts = {fir: n // len(FIRS) for fir in FIRS}
+    counts[FIRS[0]] += n % len(FIRS)
+    return counts
+
+
+# Notam record for one NOTAM, the same as parsing its HTML table
+def notam_record(id, fields):
+    schedule = lower = upper = None
+    if "D" in fields:
+        schedule = SCHEDULE_RE.match(fields["D"]).group(1)
+    if "FG" in fields:
+        lower, upper = LEVELS_RE.match(fields["FG"]).groups()
+
+    start = datetime.datetime.strptime(
+        FROM_RE.search(fields["BC"]).group(1), "%y%m%d%H%M"
+    )
+    end = TO_RE.search(fields["BC"]).group(1)
+    end = None if end == "PERM" else datetime.datetime.strptime(end, "%y%m%d%H%M")
+
+    return Notam(
+        id,
+        QGroupRe.match(fields["Q"]).groupdict(),
+        start,
+        end,
+        fields["E"][2:],
+        schedule,
+        lower,
+        upper,
+    )
+
+
+# -----------------------------------------------------------------------
+# (id, fields) for the NOTAMs in one FIR active between date_from and
+# date_to. Each FIR has its own random sequence so separate briefings for
+# each FIR (or date window) add up to the combined one
+def fir_notams(n, date, fir, date_from, date_to, seed=0, scenario="normal"):
+    rng = random.Random(f"{seed}-{fir}")
+    series = FIRS.index(fir) * 5000
+
+    family_weights, n_centres = SCENARIOS[scenario]
+    centres = [
+        (rng.uniform(*FIR_LATS[fir]), rng.uniform(-6.0, 1.0)) for _ in range(n_centres)
+    ]
+
+    notams = []
+    for i in range(n):
+        fields = notam_fields(rng, date, fir, family_weights, centres)
+        id = f"{rng.choice('ABCHMW')}{(series + i) % 10000:04d}/{date:%y}"
+
+        end = fields["end"]
+        if fields["start"].date() <= date_to and (
+            end is None or end.date() >= date_from
+        ):
+            notams.append((id, fields))
+
+    return notams
+
+
+# HTML table rows for the NOTAMs in one FIR
+def fir_rows(n, date, fir, date_from, date_to, seed=0, scenario="normal"):
+    return [
+        notam_html(id, fields)
+        for id, fields in fir_notams(n, date, fir, date_from, date_to, seed, scenario)
+    ]
+
+
+# -----------------------------------------------------------------------
+# Header paragraphs of the PIB result page
+def pib_header(firs, date_from, date_to):
+    return [
+        "PRE-FLIGHT INFORMATION BULLETIN",
+        f"Area briefing {' '.join(firs)}",
+        f"Valid from {date_from:%Y-%m-%d} 00:00 to {date_to:%Y-%m-%d} 23:59",
+    ]
+
+
+# Generate PIB result page from a corpus of n NOTAMs, split over all FIRs,
+# generated relative to date. Only NOTAMs in firs and active between
+# date_from and date_to (default date) are included
+def pib_html(
+    n, date, seed=0, firs=FIRS, date_from=None, date_to=None, scenario="normal"
+):
+    date_from = date_from or date
+    date_to = date_to or date_from
+
+    rows = []
+    for fir, count in fir_counts(n).items():
+        if fir in firs:
+            rows.extend(fir_rows(count, date, fir, date_from, date_to, seed, scenario))
+
+    paras = "".join(f"<p>{p}</p>" for p in pib_header(firs, date_from, date_to))
+    header = f'<div class="uibs-pib-result-header">{paras}</div>'
+
+    return (
+        "<!DOCTYPE html><html><head><title>PIB</title></head><body>"
+        '<form id="mainPage:mainForm">'
+        f"{header}"
+        f'<table class="pibTable">{"".join(rows)}</table>'
+        "</form></body></html>"
+    )
+
+
+# Notam records and header text for the same NOTAMs as pib_html, without
+# generating and parsing the HTML
+def pib_notams(
+    n, date, seed=0, firs=FIRS, date_from=None, date_to=None, scenario="normal"
+):
+    date_from = date_from or date
+    date_to = date_to or date_from
+
+    notams = []
+    for fir, count in fir_counts(n).items():
+        if fir in firs:
+            notams.extend(
+                notam_record(id, fields)
+                for id, fields in fir_notams(
+                    count, date, fir, date_from, date_to, seed, scenario
+                )
+            )
+
+    return notams, "".join(pib_header(firs, date_from, date_to))
+
+
+# -----------------------------------------------------------------------
+def synthetic_cli():
+    parser = argparse.ArgumentParser(description="Synthetic PIB generator")
+    parser.add_argument(
+        "--notams",
+        "-n",
+        type=int,
+        default=NORMAL_DAY,
+        help="corpus size (default: %(default)s)",
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="normal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--days", "-d", type=int, default=2, help="briefing days (default: 2)"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--html", metavar="PATH", help="write PIB result page")
+    group.add_argument(
+        "--snapshot", metavar="DIR", help="write briefing snapshot to directory"
+    )
+    args = parser.parse_args()
+
+    date = datetime.datetime.now(datetime.UTC).date()
+    date_to = date + datetime.timedelta(days=args.days - 1)
+    page = pib_html(
+        args.notams, date, args.seed, FIRS, date, date_to, scenario=args.scenario
+    )
+
+    if args.html:
+        with open(args.html, "w") as f:
+            f.write(page)
+    else:
+        from navplot.snapshot import save_snapshot
+
+        hdr = "".join(pib_header(FIRS, date, date_to))
+        print(save_snapshot(args.snapshot, [page], hdr, date, date_to))
+
+
+if __name__ == "__main__":
+    synthetic_cli()
@@ -16,57 +16,160 @@
 # along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import hashlib
+import json
 import os
 
 from dotenv import load_dotenv
 
-from navplot import get_notams, make_briefing
+from navplot import get_notams, load_notams, make_briefings, read_snapshot
+from navplot.basemap import CACHE_DIR
+from navplot.dateindex import DateIndex
+from navplot.instrument import enable, profile_file, read_profile, span, summary
+from navplot.manifest import read_manifest, rebuild_reason, write_manifest
+from navplot.navplot import briefing_digest, prepare_maps
+from navplot.notamdoc import GLIDING_SITES, site_extent
+from navplot.rules import DEFAULT_RULESET, load_rules
+from navplot.session import SessionStore
 
 # Map origin and scaling
 SOUTH_EXTENTS = (50.2, -5.0, 6.5)
 NORTH_EXTENTS = (53.0, -6.0, 6.0)
 
+# Time limit for each request to the NATS website (seconds)
+FETCH_TIMEOUT = 120
 
-def build(user, password):
-    today = datetime.datetime.now(datetime.UTC).date()
-    tomorrow = today + datetime.timedelta(days=1)
-
-    notams, hdr = get_notams(user, password, today, tomorrow)
-
-    # Today's NOTAMs
-    make_briefing(
-        os.path.join(args.directory, "today_south.pdf"),
-        notams,
-        hdr,
-        today,
-        SOUTH_EXTENTS,
-    )
-
-    make_briefing(
-        os.path.join(args.directory, "today_north.pdf"),
-        notams,
-        hdr,
-        today,
-        NORTH_EXTENTS,
-    )
-
-    # Tomorrow's NOTAMs
-    make_briefing(
-        os.path.join(args.directory, "tomorrow_south.pdf"),
-        notams,
-        hdr,
-        tomorrow,
-        SOUTH_EXTENTS,
-    )
-
-    make_briefing(
-        os.path.join(args.directory, "tomorrow_north.pdf"),
-        notams,
-        hdr,
-        tomorrow,
-        NORTH_EXTENTS,
-    )
+# Discord message length limit (characters)
+DISCORD_MAX_CONTENT = 2000
+
+
+# Default build manifest for an output directory, kept in the cache
+# directory so it isn't published with the briefings. None if the cache
+# is disabled
+def default_manifest(directory):
+    if CACHE_DIR is None:
+        return None
+
+    key = hashlib.sha1(os.path.abspath(directory).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"manifest-{key}.json")
+
+
+# Output file prefix for each day of the briefing horizon
+def day_name(n, date):
+    if n == 0:
+        return "today"
+    elif n == 1:
+        return "tomorrow"
+    else:
+        return f"{date:%Y-%m-%d}"
+
+
+def build(
+    directory,
+    user,
+    password,
+    days=2,
+    snapshot_dir=None,
+    from_snapshot=None,
+    concurrent=False,
+    rules=DEFAULT_RULESET,
+    sites=(),
+    session_file=None,
+    workers=None,
+    manifest_file=None,
+    force=False,
+):
+    # South and north briefings, plus any gliding site briefings, for each
+    # day
+    areas = [("south", SOUTH_EXTENTS), ("north", NORTH_EXTENTS)]
+    for site in sites:
+        areas.append((site.lower(), site_extent(*GLIDING_SITES[site])))
+
+    # Map data and base maps don't depend on the NOTAMs, so are prepared
+    # in the background while the NOTAMs are fetched
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        maps = executor.submit(prepare_maps, [extents for _, extents in areas])
+
+        if from_snapshot:
+            # Re-build from a saved briefing, with its original dates. Days
+            # after the end of the snapshot would be missing NOTAMs
+            snapshot = read_snapshot(from_snapshot)
+            today = snapshot["date_from"]
+
+            snapshot_days = (snapshot["date_to"] - today).days + 1
+            if days > snapshot_days:
+                print(f"Snapshot only covers {snapshot_days} day(s)")
+                days = snapshot_days
+
+            with span("fetch", source="snapshot"):
+                notams, hdr = load_notams(snapshot)
+        else:
+            today = datetime.datetime.now(datetime.UTC).date()
+            last_day = today + datetime.timedelta(days=days - 1)
+
+            with span("fetch", source="nats"):
+                notams, hdr = get_notams(
+                    user,
+                    password,
+                    today,
+                    last_day,
+                    snapshot_dir=snapshot_dir,
+                    concurrent=concurrent,
+                    timeout=FETCH_TIMEOUT,
+                    session_store=SessionStore(session_file) if session_file else None,
+                )
+
+        with span("wait_maps"):
+            maps.result()
+
+    # Classify and index NOTAMs by date, shared by all the briefings
+    with span("index", notams=len(notams)):
+        rules.apply(notams)
+        notams = DateIndex(notams)
+
+    briefings = []
+    for n in range(days):
+        date = today + datetime.timedelta(days=n)
+        name = day_name(n, date)
+        for area, extents in areas:
+            briefings.append((f"{name}_{area}.pdf", date, extents))
+
+    # Skip briefings whose inputs are unchanged since the last build
+    manifest_file = manifest_file or default_manifest(directory)
+    manifest = {} if force or not manifest_file else read_manifest(manifest_file)
+
+    jobs = []
+    digests = {}
+    for name, date, extents in briefings:
+        filename = os.path.join(directory, name)
+        digest = briefing_digest(notams, hdr, date, extents)
+
+        reason = "forced" if force else rebuild_reason(manifest, filename, digest)
+        if reason:
+            print(f"Building {name}: {reason}")
+            jobs.append((filename, date, extents))
+            digests[name] = digest
+        else:
+            print(f"Skipping {name}: unchanged")
+
+    # Render in parallel
+    with span("render", briefings=len(jobs)):
+        errors = make_briefings(jobs, notams, hdr, workers=workers)
+
+    for filename, *_ in jobs:
+        name = os.path.basename(filename)
+        if filename in errors:
+            manifest.pop(name, None)
+        else:
+            manifest[name] = digests[name]
+    if manifest_file:
+        write_manifest(manifest_file, manifest)
+
+    if errors:
+        msg = "\n".join(f"{os.path.basename(f)}: {e!r}" for f, e in errors.items())
+        raise RuntimeError(f"Failed to make briefings\n{msg}")
 
 
 if __name__ == "__main__":
@@ -87,13 +190,109 @@ if __name__ == "__main__":
             help="NATS AIP password",
             default=os.environ.get("NATS_PASSWORD"),
         )
+        parser.add_argument(
+            "--workers",
+            "-w",
+            type=int,
+            help="number of render processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--days",
+            "-d",
+            type=int,
+            default=2,
+            help="number of days to brief, starting today (default: 2, "
+            "limited to the days in a snapshot)",
+        )
+        parser.add_argument(
+            "--concurrent",
+            action="store_true",
+            help="fetch each FIR in a separate, concurrent session",
+        )
+        parser.add_argument(
+            "--sites",
+            nargs="+",
+            metavar="SITE",
+            choices=[*GLIDING_SITES, "all"],
+            default=[],
+            help="also brief maps centred on gliding sites, or all",
+        )
+        parser.add_argument(
+            "--rules",
+            metavar="PATH",
+            help="NOTAM classification rules (JSON)",
+        )
+        parser.add_argument(
+            "--manifest",
+            metavar="PATH",
+            help="build manifest (default: in the navplot cache directory)",
+        )
+        parser.add_argument(
+            "--force",
+            "-f",
+            action="store_true",
+            help="rebuild all briefings, even if unchanged",
+        )
+        parser.add_argument(
+            "--save-snapshot",
+            metavar="DIR",
+            help="save raw briefing to directory",
+            default=os.environ.get("NAVPLOT_SNAPSHOT_DIR"),
+        )
+        parser.add_argument(
+            "--session-file",
+            metavar="PATH",
+            help="reuse logged in NATS sessions stored in file",
+            default=os.environ.get("NAVPLOT_SESSION_FILE"),
+        )
+        parser.add_argument(
+            "--from-snapshot",
+            metavar="PATH",
+            help="build from saved briefing, no network access",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            help="write per-stage timing and memory to file (JSON lines)",
+        )
         args = parser.parse_args()
 
-        build(args.user, args.password)
+        if args.profile:
+            open(args.profile, "w").close()
+            enable(args.profile)
+
+        build(
+            args.directory,
+            args.user,
+            args.password,
+            args.days,
+            args.save_snapshot,
+            args.from_snapshot,
+            args.concurrent,
+            load_rules(args.rules) if args.rules else DEFAULT_RULESET,
+            list(GLIDING_SITES) if "all" in args.sites else args.sites,
+            args.session_file,
+            args.workers,
+            args.manifest,
+            args.force,
+        )
     except Exception:
         import requests
         import traceback
 
-        # Send failure message to Discord
+        # Send failure message to Discord, keeping the end of the traceback
+        # if it's too long, with the profile summary (if enabled) attached
         tb = traceback.format_exc()
-        requests.post(os.environ.get("DISCORD_WEB_HOOK"), json={"content": tb})
+        if len(tb) > DISCORD_MAX_CONTENT:
+            tb = "...\n" + tb[-(DISCORD_MAX_CONTENT - 4) :]
+
+        url = os.environ.get("DISCORD_WEB_HOOK")
+        if profile_file() and os.path.exists(profile_file()):
+            profile = summary(read_profile(profile_file()))
+            requests.post(
+                url,
+                data={"payload_json": json.dumps({"content": tb})},
+                files={"files[0]": ("profile.txt", profile.encode())},
+            )
+        else:
+            requests.post(url, json={"content": tb})
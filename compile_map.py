@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import os
+
+import navplot
+from navplot.mapdata import compile_map_data
+
+DATA_DIR = os.path.join(os.path.dirname(navplot.__file__), "data")
+
+
+def compile_map_cli():
+    parser = argparse.ArgumentParser(
+        description="Convert GeoJSON map layers to packed binary format"
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default=DATA_DIR,
+        help="directory containing yaixm.geojson and coast.geojson",
+    )
+    args = parser.parse_args()
+
+    compile_map_data(args.directory)
+
+
+if __name__ == "__main__":
+    compile_map_cli()
@@ -18,8 +18,11 @@
 
 import argparse
 import datetime
+import sys
 
-from navplot import get_notams, make_briefing
+from navplot import get_notams, load_notams, make_briefing, read_snapshot
+from navplot.instrument import enable, read_profile, span, summary
+from navplot.session import SessionStore
 
 # Map origin and scaling
 SOUTH = (50.2, -5.0, 6.5)
@@ -40,18 +43,61 @@ def navplot_cli():
     )
     group.add_argument("--north", action="store_true", help="Plot North of country")
     parser.add_argument("--debug", action="store_true", help="Print QCODE text")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--save-snapshot", metavar="DIR", help="Save raw briefing to directory"
+    )
+    group.add_argument(
+        "--from-snapshot", metavar="PATH", help="Use saved briefing, no network access"
+    )
+    parser.add_argument(
+        "--session-file",
+        metavar="PATH",
+        help="reuse logged in NATS sessions stored in file",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="write per-stage timing and memory to file (JSON lines)",
+    )
     args = parser.parse_args()
 
-    # Use with UTC times/dates
-    date = datetime.datetime.now(datetime.UTC).date()
+    if args.profile:
+        open(args.profile, "w").close()
+        enable(args.profile)
+
+    if args.from_snapshot:
+        # Dates are relative to when the snapshot was taken
+        snapshot = read_snapshot(args.from_snapshot)
+        date = snapshot["date_from"]
+    else:
+        # Use with UTC times/dates
+        date = datetime.datetime.now(datetime.UTC).date()
+
     if args.tomorrow:
         date += datetime.timedelta(1)
 
     mapscale = NORTH if args.north else SOUTH
 
-    notams, hdr = get_notams(args.user, args.password, date, date)
+    with span("fetch"):
+        if args.from_snapshot:
+            notams, hdr = load_notams(snapshot)
+        else:
+            notams, hdr = get_notams(
+                args.user,
+                args.password,
+                date,
+                date,
+                snapshot_dir=args.save_snapshot,
+                session_store=(
+                    SessionStore(args.session_file) if args.session_file else None
+                ),
+            )
     make_briefing(args.pdf_filename, notams, hdr, date, mapscale, args.debug)
 
+    if args.profile:
+        print(summary(read_profile(args.profile)), file=sys.stderr)
+
 
 if __name__ == "__main__":
     navplot_cli()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Long running briefing server. NOTAMs and map data are kept in memory,
+# NOTAMs are refreshed on a schedule and briefings are rendered on
+# demand, e.g.
+#
+#   GET /briefing.pdf?date=2026-10-18&area=south
+#   GET /briefing.pdf?date=2026-10-18&extent=50.2,-5.0,6.5
+
+import argparse
+import collections
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import os
+import threading
+import traceback
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+from navplot import get_map_data, get_notams, load_notams, make_briefing
+from navplot import read_snapshot
+from navplot.dateindex import DateIndex
+from navplot.navplot import NATS_URL, briefing_digest, filter_notams
+from navplot.rules import DEFAULT_RULESET, classify, load_rules
+from navplot.session import SessionStore
+from navplot.spatial import SpatialIndex
+
+# Named map extents
+AREAS = {
+    "south": (50.2, -5.0, 6.5),
+    "north": (53.0, -6.0, 6.0),
+}
+
+# Limits for custom map extents. The map is drawn upwards from its
+# bottom latitude, so these keep the top of the map well short of the pole
+MAX_EXTENT_LAT = 60
+MAX_EXTENT_SCALE = 30
+
+# Number of briefing digests kept, there is one for each date and map
+# extent requested
+MAX_DIGESTS = 1024
+
+# Time limit for each request to the NATS website (seconds)
+FETCH_TIMEOUT = 120
+
+
+# -----------------------------------------------------------------------
+# Custom map extent from "lat,lon,scale", where lat/lon is the bottom
+# left corner of the map and scale its width in degrees of longitude
+def parse_extent(text):
+    extent = tuple(float(x) for x in text.split(","))
+    if len(extent) != 3:
+        raise ValueError("extent should be lat,lon,scale")
+
+    lat, lon, scale = extent
+    if not all(math.isfinite(x) for x in extent):
+        raise ValueError("extent values must be finite")
+    if not -MAX_EXTENT_LAT <= lat <= MAX_EXTENT_LAT:
+        raise ValueError(f"extent latitude must be within +/-{MAX_EXTENT_LAT}")
+    if not -180 <= lon <= 180:
+        raise ValueError("extent longitude must be within +/-180")
+    if not 0 < scale <= MAX_EXTENT_SCALE:
+        raise ValueError(f"extent scale must be > 0 and <= {MAX_EXTENT_SCALE}")
+
+    return extent
+
+
+# -----------------------------------------------------------------------
+# Size bounded LRU cache of rendered briefings
+class BriefingCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            data = self.items.get(key)
+            if data is not None:
+                self.items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.items:
+                self.size -= len(self.items.pop(key))
+
+            self.items[key] = data
+            self.size += len(data)
+
+            while self.size > self.max_bytes:
+                _, old = self.items.popitem(last=False)
+                self.size -= len(old)
+
+
+# -----------------------------------------------------------------------
+class BriefingService:
+    def __init__(
+        self,
+        user=None,
+        password=None,
+        days=2,
+        from_snapshot=None,
+        base_url=NATS_URL,
+        concurrent=False,
+        rules=DEFAULT_RULESET,
+        cache_bytes=64 * 1024 * 1024,
+        session_file=None,
+    ):
+        self.user = user
+        self.password = password
+        self.days = days
+        self.from_snapshot = from_snapshot
+        self.base_url = base_url
+        self.concurrent = concurrent
+        self.rules = rules
+
+        # Logged in NATS sessions, reused between refreshes
+        self.session_store = SessionStore(session_file) if session_file else None
+
+        self.cache = BriefingCache(cache_bytes)
+        self.map_data = get_map_data()
+
+        # Current NOTAMs, replaced as a whole on each refresh
+        self.briefing = None
+        self.lock = threading.Lock()
+
+        # Renders are serialised, concurrent requests for the same
+        # briefing wait for the first one rather than duplicating it
+        self.render_lock = threading.Lock()
+
+        self.stopped = threading.Event()
+        self.thread = None
+
+    # Fetch (or re-read) NOTAMs
+    def refresh(self):
+        if self.from_snapshot:
+            snapshot = read_snapshot(self.from_snapshot)
+            date_from = snapshot["date_from"]
+            date_to = snapshot["date_to"]
+
+            notams, hdr = load_notams(snapshot)
+        else:
+            date_from = datetime.datetime.now(datetime.UTC).date()
+            date_to = date_from + datetime.timedelta(days=self.days - 1)
+
+            notams, hdr = get_notams(
+                self.user,
+                self.password,
+                date_from,
+                date_to,
+                base_url=self.base_url,
+                concurrent=self.concurrent,
+                timeout=FETCH_TIMEOUT,
+                session_store=self.session_store,
+            )
+
+        self.rules.apply(notams)
+        index = DateIndex(notams)
+
+        briefing = {
+            "notams": index,
+            "hdr": hdr,
+            "date_from": date_from,
+            "date_to": date_to,
+            "spatial_index": SpatialIndex(index.notams),
+            "digests": collections.OrderedDict(),
+            "pages": {},
+            "updated": datetime.datetime.now(datetime.UTC),
+        }
+        with self.lock:
+            self.briefing = briefing
+
+    # Refresh NOTAMs every interval seconds, keeping the previous NOTAMs
+    # if a refresh fails
+    def start(self, interval):
+        def run():
+            while not self.stopped.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    traceback.print_exc()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    # Hash of the briefing inputs, used as cache key and ETag. Returns
+    # None if the date isn't covered by the current NOTAMs
+    def digest(self, date, extent):
+        with self.lock:
+            briefing = self.briefing
+
+        if not briefing["date_from"] <= date <= briefing["date_to"]:
+            return briefing, None
+
+        # Least recently used digests are discarded
+        key = (date, extent)
+        digests = briefing["digests"]
+        with self.lock:
+            digest = digests.get(key)
+            if digest is not None:
+                digests.move_to_end(key)
+
+        if digest is None:
+            digest = briefing_digest(
+                briefing["notams"],
+                briefing["hdr"],
+                date,
+                extent,
+                map_data=self.map_data,
+            )
+            with self.lock:
+                digests[key] = digest
+                while len(digests) > MAX_DIGESTS:
+                    digests.popitem(last=False)
+
+        return briefing, digest
+
+    # Classified NOTAMs and typeset text pages for the date, shared by all
+    # the date's briefings. Called with render_lock held
+    def typeset(self, briefing, date):
+        pages = briefing["pages"].get(date)
+        if pages is None:
+            from navplot.notamdoc import typeset_text_pages
+
+            classified = classify(filter_notams(briefing["notams"], date))
+            _, area_notams, boring_notams, _ = classified
+            pages = classified, typeset_text_pages(area_notams, boring_notams)
+            briefing["pages"][date] = pages
+
+        return pages
+
+    # Returns (digest, PDF data), or (None, None) if date is out of range
+    def render(self, date, extent):
+        briefing, digest = self.digest(date, extent)
+        if digest is None:
+            return None, None
+
+        data = self.cache.get(digest)
+        if data is None:
+            with self.render_lock:
+                data = self.cache.get(digest)
+                if data is None:
+                    classified, text_pages = self.typeset(briefing, date)
+                    data = make_briefing(
+                        None,
+                        briefing["notams"],
+                        briefing["hdr"],
+                        date,
+                        extent,
+                        map_data=self.map_data,
+                        spatial_index=briefing["spatial_index"],
+                        classified=classified,
+                        text_pages=text_pages,
+                    )
+                    self.cache.put(digest, data)
+
+        return digest, data
+
+    def status(self):
+        with self.lock:
+            briefing = self.briefing
+
+        return {
+            "date_from": briefing["date_from"].isoformat(),
+            "date_to": briefing["date_to"].isoformat(),
+            "notams": len(briefing["notams"].notams),
+            "updated": briefing["updated"].isoformat(timespec="seconds"),
+            "cached": len(self.cache.items),
+            "cache_bytes": self.cache.size,
+        }
+
+
+# -----------------------------------------------------------------------
+def _handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/briefing.pdf":
+                self._briefing({k: v[0] for k, v in parse_qs(url.query).items()})
+            elif url.path == "/status":
+                self._send(
+                    200, "application/json", json.dumps(service.status()).encode()
+                )
+            else:
+                self.send_error(404)
+
+        def _briefing(self, query):
+            try:
+                date = datetime.date.fromisoformat(query["date"])
+                if "extent" in query:
+                    extent = parse_extent(query["extent"])
+                else:
+                    extent = AREAS[query.get("area", "south")]
+            except (KeyError, ValueError) as e:
+                self.send_error(400, explain=repr(e))
+                return
+
+            # Conditional GET, checked before rendering
+            _, digest = service.digest(date, extent)
+            if digest is None:
+                self.send_error(404, explain="date not in briefing period")
+                return
+
+            etag = f'"{digest}"'
+            if etag in self.headers.get("If-None-Match", ""):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            try:
+                digest, data = service.render(date, extent)
+            except Exception:
+                traceback.print_exc()
+                self.send_error(500)
+                return
+
+            self._send(200, "application/pdf", data, [("ETag", f'"{digest}"')])
+
+        def _send(self, code, content_type, data, headers=()):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for header in headers:
+                self.send_header(*header)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="NOTAM briefing server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--user",
+        "-u",
+        help="NATS AIP username",
+        default=os.environ.get("NATS_USER"),
+    )
+    parser.add_argument(
+        "--password",
+        "-p",
+        help="NATS AIP password",
+        default=os.environ.get("NATS_PASSWORD"),
+    )
+    parser.add_argument(
+        "--days",
+        "-d",
+        type=int,
+        default=2,
+        help="number of days to brief, starting today (default: 2)",
+    )
+    parser.add_argument(
+        "--refresh",
+        type=float,
+        default=30,
+        help="NOTAM refresh interval in minutes (default: 30)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=64,
+        help="briefing cache size in MB (default: 64)",
+    )
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="fetch each FIR in a separate, concurrent session",
+    )
+    parser.add_argument(
+        "--session-file",
+        metavar="PATH",
+        help="reuse logged in NATS sessions stored in file",
+        default=os.environ.get("NAVPLOT_SESSION_FILE"),
+    )
+    parser.add_argument(
+        "--rules",
+        metavar="PATH",
+        help="NOTAM classification rules (JSON)",
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--base-url",
+        default=NATS_URL,
+        help="NATS website, e.g. bench/fake_nats.py (default: %(default)s)",
+    )
+    group.add_argument(
+        "--from-snapshot",
+        metavar="PATH",
+        help="serve saved briefing, no network access",
+    )
+    args = parser.parse_args()
+
+    service = BriefingService(
+        args.user,
+        args.password,
+        args.days,
+        args.from_snapshot,
+        args.base_url,
+        args.concurrent,
+        load_rules(args.rules) if args.rules else DEFAULT_RULESET,
+        int(args.cache_size * 1024 * 1024),
+        args.session_file,
+    )
+    service.refresh()
+    service.start(args.refresh * 60)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), _handler(service))
+    httpd.daemon_threads = True
+    print(f"Serving on http://{args.host}:{args.port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
@@ -1,3 +1,16 @@
-from .navplot import get_notams, make_briefing
+from .navplot import get_notams, load_notams, make_briefing, make_briefings
+from .mapdata import get_map_data, preload, invalidate
+from .notam import Notam
+from .snapshot import read_snapshot
 
-__all__ = [get_notams, make_briefing]
+__all__ = [
+    get_notams,
+    load_notams,
+    make_briefing,
+    make_briefings,
+    get_map_data,
+    preload,
+    invalidate,
+    Notam,
+    read_snapshot,
+]
@@ -0,0 +1,132 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import glob
+import hashlib
+import json
+import os
+import threading
+
+# Bump if the format of the cached drawing changes
+CACHE_VERSION = 1
+
+# Directory for persistent cache, set to None to disable
+CACHE_DIR = os.environ.get(
+    "NAVPLOT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "navplot")
+)
+
+# Number of drawings kept in memory and on disk, the least recently used
+# are discarded first. A long running server may see many map extents
+MAX_MEMORY_ENTRIES = 32
+MAX_DISK_ENTRIES = 128
+
+# In-memory cache of base map drawings
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+# -----------------------------------------------------------------------
+# Cache key from map data version and map projection parameters
+def cache_key(map_data, *params):
+    h = hashlib.sha1(map_data.digest().encode())
+    h.update(repr((CACHE_VERSION,) + params).encode())
+    return h.hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f"basemap-{key}.json")
+
+
+# Add drawing to the in-memory cache, discarding the least recently used
+def _remember(key, drawing):
+    with _lock:
+        _cache[key] = drawing
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_MEMORY_ENTRIES:
+            _cache.popitem(last=False)
+
+
+# Delete the least recently used cache files. Files are touched when read,
+# so their modification time is their last use
+def _prune():
+    paths = glob.glob(os.path.join(CACHE_DIR, "basemap-*.json"))
+    if len(paths) <= MAX_DISK_ENTRIES:
+        return
+
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            pass
+
+    for path in sorted(mtimes, key=mtimes.get)[:-MAX_DISK_ENTRIES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# -----------------------------------------------------------------------
+# Get cached base map drawing, or None if not cached
+def get(key):
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    if CACHE_DIR is None:
+        return None
+
+    path = _cache_path(key)
+    try:
+        with open(path) as f:
+            drawing = json.load(f)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+
+    _remember(key, drawing)
+    return drawing
+
+
+# Store base map drawing
+def put(key, drawing):
+    _remember(key, drawing)
+
+    if CACHE_DIR is None:
+        return
+
+    # Write to temporary file and rename, so concurrent builds don't see
+    # partial files. A read-only cache directory isn't an error
+    path = _cache_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(drawing, f)
+        os.replace(tmp_path, path)
+        _prune()
+    except OSError:
+        pass
+
+
+# Discard in-memory cache
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,78 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Index of NOTAM active dates. A static centred interval tree over the
+# first and last day of each NOTAM, so finding the NOTAMs active on a
+# date costs O(log n + k) rather than a scan of every NOTAM.
+
+# Last day for permanent NOTAMs
+PERM = 10**7
+
+
+class _Node:
+    def __init__(self, intervals):
+        # Intervals are (first, last, position) tuples
+        starts = sorted(i[0] for i in intervals)
+        self.centre = starts[len(starts) // 2]
+
+        left = [i for i in intervals if i[1] < self.centre]
+        right = [i for i in intervals if i[0] > self.centre]
+        overlap = [i for i in intervals if i[0] <= self.centre <= i[1]]
+
+        self.by_first = sorted(overlap, key=lambda i: i[0])
+        self.by_last = sorted(overlap, key=lambda i: i[1], reverse=True)
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+
+class DateIndex:
+    def __init__(self, notams):
+        self.notams = list(notams)
+
+        intervals = []
+        for pos, n in enumerate(self.notams):
+            first = n.start.date().toordinal()
+            last = PERM if n.end is None else n.end.date().toordinal()
+            intervals.append((first, last, pos))
+
+        self.root = _Node(intervals) if intervals else None
+
+    def __len__(self):
+        return len(self.notams)
+
+    # NOTAMs active on date, in their original order
+    def active(self, date):
+        day = date.toordinal()
+        found = []
+
+        node = self.root
+        while node:
+            if day < node.centre:
+                for first, _, pos in node.by_first:
+                    if first > day:
+                        break
+                    found.append(pos)
+                node = node.left
+            else:
+                for _, last, pos in node.by_last:
+                    if last < day:
+                        break
+                    found.append(pos)
+                node = node.right if day > node.centre else None
+
+        found.sort()
+        return [self.notams[pos] for pos in found]
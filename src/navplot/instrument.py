@@ -0,0 +1,108 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Optional pipeline instrumentation. When enabled each span is appended
+# to a file as a JSON line giving its duration and the peak memory of the
+# process. The file name is passed in the environment so render worker
+# processes record their spans too.
+
+import collections
+import contextlib
+import json
+import os
+import time
+
+PROFILE_ENV = "NAVPLOT_PROFILE"
+
+
+# Start recording spans to filename
+def enable(filename):
+    os.environ[PROFILE_ENV] = os.path.abspath(filename)
+
+
+# Profile file name, or None if instrumentation isn't enabled
+def profile_file():
+    return os.environ.get(PROFILE_ENV) or None
+
+
+# Peak resident memory of the process (KB), or None where the resource
+# module isn't available (Windows)
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# Time a stage of the pipeline. Extra fields are added to the record
+@contextlib.contextmanager
+def span(name, **fields):
+    filename = profile_file()
+    if filename is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        record = {
+            "span": name,
+            **fields,
+            "status": status,
+            "seconds": round(time.perf_counter() - start, 6),
+            "peak_rss_kb": peak_rss_kb(),
+            "pid": os.getpid(),
+            "time": round(time.time(), 3),
+        }
+
+        # Lines are written with a single call so records from parallel
+        # processes aren't interleaved
+        with open(filename, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def read_profile(filename):
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Plain text table of total and maximum time, and peak memory, per span
+def summary(records):
+    stats = collections.defaultdict(lambda: [0, 0.0, 0.0, 0, 0])
+    for r in records:
+        s = stats[r["span"]]
+        s[0] += 1
+        s[1] += r["seconds"]
+        s[2] = max(s[2], r["seconds"])
+        s[3] = max(s[3], r["peak_rss_kb"] or 0)
+        s[4] += r["status"] != "ok"
+
+    width = max((len(name) for name in stats), default=4)
+    lines = [f"{'span':{width}}  count  total(s)  max(s)  peak(MB)  errors"]
+    for name, (count, total, longest, peak, errors) in sorted(
+        stats.items(), key=lambda x: -x[1][1]
+    ):
+        lines.append(
+            f"{name:{width}}  {count:5}  {total:8.3f}  {longest:6.3f}"
+            f"  {peak / 1024:8.1f}  {errors:6}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,57 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Build manifest, a JSON file mapping output filename to the digest of
+# the inputs it was built from
+
+import json
+import os
+
+
+# -----------------------------------------------------------------------
+# Read manifest, a missing or corrupt manifest is treated as empty
+def read_manifest(filename):
+    try:
+        with open(filename) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return manifest if isinstance(manifest, dict) else {}
+
+
+# Write manifest, creating its directory if needed
+def write_manifest(filename, manifest):
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_filename, filename)
+
+
+# -----------------------------------------------------------------------
+# Reason an output needs rebuilding, or None if it is up to date
+def rebuild_reason(manifest, filename, digest):
+    name = os.path.basename(filename)
+    if name not in manifest:
+        return "not in manifest"
+    elif not os.path.exists(filename):
+        return "output missing"
+    elif manifest[name] != digest:
+        return "inputs changed"
+    else:
+        return None
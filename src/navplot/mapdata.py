@@ -0,0 +1,237 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import hashlib
+from importlib.resources import files, as_file
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+
+import navplot
+
+# Packed layer file format. A header (magic, ring count, point count)
+# followed by ring start offsets (uint32, in points, ring count + 1
+# entries) and then the flat lon/lat coordinates as little-endian float64.
+# The coordinate block is 8-byte aligned so it can be used directly from
+# a memory map.
+LAYER_MAGIC = b"NPMAP1\0\0"
+LAYER_HEADER = struct.Struct("<8sII")
+
+# Base map layers
+LAYERS = ("yaixm", "coast")
+
+# Process-wide map data, loaded on first use
+_map_data = None
+_lock = threading.Lock()
+
+
+# -----------------------------------------------------------------------
+# A single base map layer. Coordinates are held in a flat lon, lat, lon,
+# lat... sequence with offsets giving the first point of each ring. Only
+# the outer ring of each feature is kept since that's all the map draws.
+class Layer:
+    def __init__(self, coords, offsets):
+        self.coords = coords
+        self.offsets = offsets
+        self._bounds = None
+        self._coslats = None
+
+    @classmethod
+    def from_geojson(cls, geojson):
+        coords = array.array("d")
+        offsets = array.array("I", [0])
+        for f in geojson["features"]:
+            ring = f["geometry"]["coordinates"][0]
+            for p in ring:
+                coords.append(p[0])
+                coords.append(p[1])
+            offsets.append(offsets[-1] + len(ring))
+
+        return cls(coords, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lons(self):
+        return self.coords[0::2]
+
+    @property
+    def lats(self):
+        return self.coords[1::2]
+
+    # (start, end) point indices of each ring
+    def spans(self):
+        return zip(self.offsets[:-1], self.offsets[1:])
+
+    # (lon_min, lon_max, lat_min, lat_max) of each ring. Computed once and
+    # shared by all map extents
+    def bounds(self):
+        if self._bounds is None:
+            lons = self.lons
+            lats = self.lats
+            self._bounds = [
+                (
+                    min(lons[start:end]),
+                    max(lons[start:end]),
+                    min(lats[start:end]),
+                    max(lats[start:end]),
+                )
+                for start, end in self.spans()
+            ]
+
+        return self._bounds
+
+    # Cosine of each point's latitude, for projection
+    def coslats(self):
+        if self._coslats is None:
+            cos = math.cos
+            radians = math.radians
+            self._coslats = array.array("d", [cos(radians(y)) for y in self.lats])
+
+        return self._coslats
+
+    # Yield each ring as a list of (lon, lat) points
+    def __iter__(self):
+        for start, end in self.spans():
+            ring = self.coords[start * 2 : end * 2]
+            yield list(zip(ring[::2], ring[1::2]))
+
+
+# -----------------------------------------------------------------------
+# Base map data
+class MapData:
+    def __init__(self, airspace, coast):
+        self.airspace = airspace
+        self.coast = coast
+        self._digest = None
+
+    # Hash of the map geometry, identifies the data version in caches
+    def digest(self):
+        if self._digest is None:
+            h = hashlib.sha1()
+            for layer in (self.airspace, self.coast):
+                h.update(array.array("I", layer.offsets).tobytes())
+                h.update(array.array("d", layer.coords).tobytes())
+            self._digest = h.hexdigest()
+
+        return self._digest
+
+    @classmethod
+    def from_geojson(cls, airspace_json, coast_json):
+        return cls(Layer.from_geojson(airspace_json), Layer.from_geojson(coast_json))
+
+
+# -----------------------------------------------------------------------
+# Write layer in packed format
+def write_layer(filename, layer):
+    coords = array.array("d", layer.coords)
+    offsets = array.array("I", layer.offsets)
+    if sys.byteorder != "little":
+        coords.byteswap()
+        offsets.byteswap()
+
+    with open(filename, "wb") as f:
+        f.write(LAYER_HEADER.pack(LAYER_MAGIC, len(layer), len(coords) // 2))
+        f.write(offsets.tobytes())
+        f.write(b"\0" * (-f.tell() % 8))
+        f.write(coords.tobytes())
+
+
+# Read packed layer, memory mapping the coordinates
+def read_layer(filename):
+    with open(filename, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, nrings, npoints = LAYER_HEADER.unpack_from(buf)
+    if magic != LAYER_MAGIC:
+        raise ValueError(f"{filename} is not a packed map layer")
+
+    start = LAYER_HEADER.size
+    end = start + (nrings + 1) * 4
+    offsets = memoryview(buf)[start:end].cast("I")
+
+    start = end + (-end % 8)
+    end = start + npoints * 16
+    coords = memoryview(buf)[start:end].cast("d")
+
+    if sys.byteorder != "little":
+        offsets = array.array("I", offsets)
+        offsets.byteswap()
+        coords = array.array("d", coords)
+        coords.byteswap()
+
+    return Layer(coords, offsets)
+
+
+# -----------------------------------------------------------------------
+# Convert GeoJSON map layers in directory to packed format
+def compile_map_data(directory):
+    for name in LAYERS:
+        with open(os.path.join(directory, name + ".geojson")) as f:
+            layer = Layer.from_geojson(json.load(f))
+
+        write_layer(os.path.join(directory, name + ".bin"), layer)
+
+
+def _load_layer(name):
+    data = files(navplot).joinpath("data")
+
+    # Use packed layer if available, otherwise fall back to GeoJSON
+    source = data.joinpath(name + ".bin")
+    if source.is_file():
+        with as_file(source) as path:
+            return read_layer(path)
+
+    with as_file(data.joinpath(name + ".geojson")) as path:
+        with path.open() as f:
+            return Layer.from_geojson(json.load(f))
+
+
+# -----------------------------------------------------------------------
+# Read map data from the package data files
+def read_map_data():
+    return MapData(_load_layer("yaixm"), _load_layer("coast"))
+
+
+# -----------------------------------------------------------------------
+# Get the shared map data, loading it if necessary
+def get_map_data():
+    global _map_data
+
+    with _lock:
+        if _map_data is None:
+            _map_data = read_map_data()
+        return _map_data
+
+
+# Load map data ahead of the first briefing
+def preload():
+    get_map_data()
+
+
+# Discard cached map data, it will be re-read on next use
+def invalidate():
+    global _map_data
+
+    with _lock:
+        _map_data = None
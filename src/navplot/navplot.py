@@ -15,23 +15,38 @@
 # You should have received a copy of the GNU General Public License
 # along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import datetime
-from importlib.resources import files, as_file
+import functools
+import hashlib
+import io
 import json
 import re
 import warnings
 
-import mechanicalsoup
-import bs4
+import navplot.dateindex
+import navplot.instrument
+import navplot.mapdata
+from navplot.notam import Notam
+import navplot.rules
+import navplot.session
+import navplot.snapshot
+import navplot.spatial
 
-import navplot
-import navplot.notamdoc
+# The network and HTML parsing libraries (mechanicalsoup, bs4) and ReportLab
+# are slow to import, so are only imported when first used. Rendering from a
+# snapshot never loads the network stack and computing briefing digests
+# needs neither.
 
+NATS_URL = "https://nats-uk.ead-it.com/fwf-nats"
+LOGIN_PATH = "/mobile/public/login.faces"
+AREA_BRIEF_PATH = "/mobile/restricted/pib/mobile-briefing-new-area.faces"
 
-warnings.filterwarnings(action="ignore", category=bs4.XMLParsedAsHTMLWarning)
+# FIRs included in the briefing
+FIRS = ("EGTT", "EGPX")
 
-LOGIN_URL = "https://nats-uk.ead-it.com/fwf-nats/mobile/public/login.faces"
-AREA_BRIEF_URL = "https://nats-uk.ead-it.com/fwf-nats/mobile/restricted/pib/mobile-briefing-new-area.faces"
+# Bump when briefing layout changes, so unchanged NOTAMs are re-rendered
+DIGEST_VERSION = 4
 
 # Regex for the Q-line
 QGroupRe = re.compile(
@@ -54,74 +69,136 @@ LEVELS_RE = re.compile(r"F\)(.+?) G\)(.+)")
 
 
 # -----------------------------------------------------------------------
-# Extract NOTAM data from the HTML soup
-def parse_soup(soup):
-    notam_dict = {}
-    for notam in soup.findAll("table", class_="notamTable"):
-        id = notam.parent.parent.td.string
+# Import bs4 and ignore its warning about parsing the XHTML briefing pages
+# as HTML
+@functools.cache
+def _bs4():
+    import bs4
+
+    warnings.filterwarnings(action="ignore", category=bs4.XMLParsedAsHTMLWarning)
+    return bs4
+
 
-        # Get Q-Line
-        qline = notam.find(text=QGroupRe)
-        n_dict = {"qline": QGroupRe.match(qline.string).groupdict()}
+# -----------------------------------------------------------------------
+# Make NOTAM record from the text elements of its table
+def notam_record(
+    id, qline, from_element, to_element, schedule_element, levels_element, description
+):
+    # Get Q-Line
+    qline = QGroupRe.match(qline.string).groupdict()
+
+    # Get "From" time
+    from_str = FROM_RE.search(from_element.string).group(1)
+    start = datetime.datetime.strptime(from_str, "%y%m%d%H%M")
 
-        # Get "From" time
-        from_element = notam.find(text=FROM_RE)
-        from_str = FROM_RE.search(from_element.string).group(1)
-        n_dict["from"] = datetime.datetime.strptime(from_str, "%y%m%d%H%M")
+    # Get "To" time
+    to_str = TO_RE.search(to_element.string).group(1)
+    end = None
+    if to_str != "PERM":
+        end = datetime.datetime.strptime(to_str, "%y%m%d%H%M")
 
-        # Get "To" time
-        to_element = notam.find(text=TO_RE)
-        to_str = TO_RE.search(to_element.string).group(1)
-        if to_str != "PERM":
-            n_dict["to"] = datetime.datetime.strptime(to_str, "%y%m%d%H%M")
+    # Get schedule
+    schedule = None
+    if schedule_element:
+        schedule = SCHEDULE_RE.match(schedule_element.string).group(1)
 
-        # Get schedule
-        schedule_element = notam.find(text=SCHEDULE_RE)
-        if schedule_element:
-            n_dict["schedule"] = SCHEDULE_RE.match(schedule_element.string).group(1)
+    # Get levels
+    lower = upper = None
+    if levels_element:
+        levels = LEVELS_RE.match(levels_element.string)
+        lower = levels.group(1)
+        upper = levels.group(2)
 
-        # Get levels
-        levels_element = notam.find(text=LEVELS_RE)
-        if levels_element:
-            levels = LEVELS_RE.match(levels_element.string)
-            n_dict["lower"] = levels.group(1)
-            n_dict["upper"] = levels.group(2)
+    # Get description text
+    text = description.string[2:]
 
-        # Get description text
-        description_element = notam.find(text=DESCRIPTION_RE)
-        n_dict["text"] = description_element.string[2:]
+    return Notam(str(id), qline, start, end, text, schedule, lower, upper)
 
-        notam_dict[id] = n_dict
+
+# -----------------------------------------------------------------------
+# Extract NOTAM data from the HTML soup. Each NOTAM table's text is
+# scanned once, the first string matching each field's regex is used.
+# NOTAMs are added to notam_dict, keyed by id, if given
+def parse_soup(soup, notam_dict=None):
+    NavigableString = _bs4().NavigableString
+    notam_dict = {} if notam_dict is None else notam_dict
+    for notam in soup.find_all("table", class_="notamTable"):
+        id = notam.parent.parent.td.string
+
+        qline = from_el = to_el = schedule_el = levels_el = description = None
+        for s in notam.descendants:
+            if not isinstance(s, NavigableString):
+                continue
+
+            # Cheap substring tests before trying the regexes
+            if qline is None and s.startswith("Q)") and QGroupRe.match(s):
+                qline = s
+            if from_el is None and "B)" in s and FROM_RE.search(s):
+                from_el = s
+            if to_el is None and "C)" in s and TO_RE.search(s):
+                to_el = s
+            if schedule_el is None and s.startswith("D)") and SCHEDULE_RE.match(s):
+                schedule_el = s
+            if levels_el is None and "F)" in s and LEVELS_RE.search(s):
+                levels_el = s
+            if description is None and "E)" in s and DESCRIPTION_RE.search(s):
+                description = s
+
+        notam_dict[id] = notam_record(
+            id, qline, from_el, to_el, schedule_el, levels_el, description
+        )
 
     return list(notam_dict.values())
 
 
 # -----------------------------------------------------------------------
-# Get NOTAM data from NATS briefing website
-def get_notams(username, password, date_from, date_to):
-    browser = mechanicalsoup.StatefulBrowser()
+# Extract NOTAM data from the HTML soup, searching each NOTAM table once
+# per field. Slower than parse_soup, kept for comparison
+def parse_soup_search(soup, notam_dict=None):
+    notam_dict = {} if notam_dict is None else notam_dict
+    for notam in soup.find_all("table", class_="notamTable"):
+        id = notam.parent.parent.td.string
+
+        notam_dict[id] = notam_record(
+            id,
+            notam.find(string=QGroupRe),
+            notam.find(string=FROM_RE),
+            notam.find(string=TO_RE),
+            notam.find(string=SCHEDULE_RE),
+            notam.find(string=LEVELS_RE),
+            notam.find(string=DESCRIPTION_RE),
+        )
+
+    return list(notam_dict.values())
 
-    # Log in
-    browser.open(LOGIN_URL)
-    browser.select_form()
-    browser["login:mainForm:j_username_input"] = username
-    browser["login:mainForm:j_password"] = password
-    browser.submit_selected()
+
+# -----------------------------------------------------------------------
+# Log in to NATS briefing website and open the area briefing page
+def login(browser, username, password, base_url=NATS_URL, timeout=None):
+    with navplot.instrument.span("login"):
+        browser.open(base_url + LOGIN_PATH, timeout=timeout)
+        browser.select_form()
+        browser["login:mainForm:j_username_input"] = username
+        browser["login:mainForm:j_password"] = password
+        browser.submit_selected(timeout=timeout)
 
     # Area briefing page
-    browser.open(AREA_BRIEF_URL)
+    with navplot.instrument.span("area_brief_page"):
+        browser.open(base_url + AREA_BRIEF_PATH, timeout=timeout)
 
-    # Add EGTT
-    browser.select_form('form[id="mainPage:mainForm"]')
-    browser["mainPage:mainForm:fir:fir:fir_input_input"] = "EGTT"
-    browser.submit_selected("mainPage:mainForm:fir:fir:fir_uibsm-ad1")
 
-    # Add EGPX
+# Add FIR to the area briefing
+def add_fir(browser, fir, timeout=None):
     browser.select_form('form[id="mainPage:mainForm"]')
-    browser["mainPage:mainForm:fir:fir:fir_input_input"] = "EGPX"
-    browser.submit_selected("mainPage:mainForm:fir:fir:fir_uibsm-ad1")
+    browser["mainPage:mainForm:fir:fir:fir_input_input"] = fir
+    with navplot.instrument.span("add_fir", fir=fir):
+        browser.submit_selected(
+            "mainPage:mainForm:fir:fir:fir_uibsm-ad1", timeout=timeout
+        )
+
 
-    # Set start/end times
+# Generate the briefing, returns the PIB result page response
+def generate_pib(browser, date_from, date_to, timeout=None):
     browser.select_form('form[id="mainPage:mainForm"]')
     browser["mainPage:mainForm:startDateSelected:startDateSelected_date_input"] = (
         f"{date_from:%Y-%m-%d}"
@@ -133,45 +210,384 @@ def get_notams(username, password, date_from, date_to):
         f"{date_to:%Y-%m-%d}"
     )
     browser["mainPage:mainForm:endDateSelected:endDateSelected_time_input"] = "23:59"
-    response = browser.submit_selected("mainPage:mainForm:pibgenerate")
+    with navplot.instrument.span("generate_pib"):
+        return browser.submit_selected("mainPage:mainForm:pibgenerate", timeout=timeout)
+
+
+# Whether the browser is on the area briefing page. If not the session or
+# its view state has expired
+def on_area_page(browser):
+    return browser.page.select_one('form[id="mainPage:mainForm"]') is not None
+
 
-    notams = parse_soup(response.soup)
+# Add firs to the area briefing, returns False if the session has expired
+def add_firs(browser, firs, timeout=None):
+    for fir in firs:
+        if not on_area_page(browser):
+            return False
+        add_fir(browser, fir, timeout)
 
-    # Get header text
-    hdr = response.soup.find("div", class_="uibs-pib-result-header").get_text()
+    return on_area_page(browser)
+
+
+# Generate the briefing from the area briefing page. Returns the PIB
+# result page response, or None if the website didn't return a briefing
+# (or, if firs is given, one naming all of firs), i.e. the session has
+# expired
+def request_pib(browser, date_from, date_to, timeout=None, firs=()):
+    response = generate_pib(browser, date_from, date_to, timeout)
+
+    hdr = response.soup.find("div", class_="uibs-pib-result-header")
+    if hdr is None or not all(fir in hdr.get_text() for fir in firs):
+        return None
+
+    return response
+
+
+# Get a briefing for firs, returns the PIB result page response.
+#
+# If a session store is given, a stored session for the same FIRs is
+# resumed at its area briefing page, with the FIRs already added, and the
+# briefing generated directly. The FIRs stay on the session on the
+# website, so sessions are only reused for the same FIRs. If the session
+# has expired, or its briefing header doesn't name all the FIRs, it logs
+# in again, and the session is stored for the next briefing.
+def fetch_pib(
+    username,
+    password,
+    firs,
+    date_from,
+    date_to,
+    base_url=NATS_URL,
+    timeout=None,
+    session_store=None,
+):
+    _bs4()
+    import mechanicalsoup
+
+    browser = mechanicalsoup.StatefulBrowser()
+
+    state = None
+    if session_store is not None:
+        state = session_store.checkout(username, base_url, firs)
+
+    response = None
+    if state is not None:
+        navplot.session.restore_browser(browser, state)
+        with navplot.instrument.span("resume_session"):
+            response = request_pib(browser, date_from, date_to, timeout, firs)
+        area_page = state["page"], state["url"]
+
+    if response is None:
+        browser = mechanicalsoup.StatefulBrowser()
+        login(browser, username, password, base_url, timeout)
+        if add_firs(browser, firs, timeout):
+            area_page = str(browser.page), browser.url
+            response = request_pib(browser, date_from, date_to, timeout)
+        if response is None:
+            raise RuntimeError(f"Failed to get NATS briefing from {base_url}")
+
+    if session_store is not None:
+        session_store.checkin(
+            username,
+            base_url,
+            firs,
+            navplot.session.browser_state(browser, *area_page),
+        )
+
+    return response
+
+
+# -----------------------------------------------------------------------
+# Get NOTAM data from NATS briefing website. If concurrent is set each FIR
+# (and each day, if split_days is set) is fetched in its own session, in
+# parallel. timeout is the time limit (seconds) for each request. Logged
+# in sessions are reused between calls if a session_store is given
+def get_notams(
+    username,
+    password,
+    date_from,
+    date_to,
+    parser=parse_soup,
+    snapshot_dir=None,
+    base_url=NATS_URL,
+    concurrent=False,
+    split_days=False,
+    timeout=None,
+    session_store=None,
+):
+    if concurrent:
+        windows = [(date_from, date_to)]
+        if split_days:
+            days = (date_to - date_from).days + 1
+            windows = [
+                (date_from + datetime.timedelta(days=d),) * 2 for d in range(days)
+            ]
+
+        briefings = [((fir,), w[0], w[1]) for fir in FIRS for w in windows]
+        with ThreadPoolExecutor(max_workers=len(briefings)) as executor:
+            futures = [
+                executor.submit(
+                    fetch_pib,
+                    username,
+                    password,
+                    *b,
+                    base_url,
+                    timeout,
+                    session_store,
+                )
+                for b in briefings
+            ]
+            responses = [f.result() for f in futures]
+    else:
+        responses = [
+            fetch_pib(
+                username,
+                password,
+                FIRS,
+                date_from,
+                date_to,
+                base_url,
+                timeout,
+                session_store,
+            )
+        ]
+
+    notams, hdr = parse_pibs([r.soup for r in responses], parser)
+
+    # Optionally keep the raw briefing for offline re-rendering
+    if snapshot_dir:
+        navplot.snapshot.save_snapshot(
+            snapshot_dir, [r.text for r in responses], hdr, date_from, date_to
+        )
 
     return notams, hdr
 
 
+# -----------------------------------------------------------------------
+# Get NOTAMs and header text from one or more PIB result pages. NOTAMs
+# appearing on more than one page are only included once
+def parse_pibs(soups, parser=parse_soup):
+    notam_dict = {}
+    headers = []
+    for soup in soups:
+        with navplot.instrument.span("parse", parser=parser.__name__):
+            parser(soup, notam_dict)
+
+        # Get header text
+        hdr = soup.find("div", class_="uibs-pib-result-header").get_text()
+        if hdr not in headers:
+            headers.append(hdr)
+
+    return list(notam_dict.values()), "\n".join(headers)
+
+
+# Get NOTAMs and header text from PIB result page
+def parse_pib(soup, parser=parse_soup):
+    return parse_pibs([soup], parser)
+
+
+# -----------------------------------------------------------------------
+# Get NOTAM data from a saved briefing snapshot, as for get_notams
+def load_notams(snapshot, parser=parse_soup):
+    bs4 = _bs4()
+    soups = [bs4.BeautifulSoup(page, "lxml") for page in snapshot["pages"]]
+    return parse_pibs(soups, parser)
+
+
 # -----------------------------------------------------------------------
 # Filter by date
 def date_filter(notam, date):
-    if date < notam["from"].date():
+    if date < notam.start.date():
         return False
-    elif "to" not in notam:
+    elif notam.end is None:
         return True
     else:
-        return date <= notam["to"].date()
+        return date <= notam.end.date()
+
+
+# Get NOTAMs active on date from a list of NOTAMs or a DateIndex
+def filter_notams(notams, date):
+    with navplot.instrument.span("filter", date=date):
+        if isinstance(notams, navplot.dateindex.DateIndex):
+            return notams.active(date)
+        else:
+            return [n for n in notams if date_filter(n, date)]
+
+
+# -----------------------------------------------------------------------
+# Hash of everything that goes into a briefing, for detecting unchanged
+# briefings
+def briefing_digest(
+    notams, hdr, date, map_extent, debug=False, map_data=None, rules=None
+):
+    notams = filter_notams(notams, date)
+    classified = navplot.rules.classify(notams, debug, rules)
+
+    if map_data is None:
+        map_data = navplot.mapdata.get_map_data()
+
+    inputs = [
+        DIGEST_VERSION,
+        classified,
+        hdr,
+        date.isoformat(),
+        list(map_extent),
+        map_data.digest(),
+    ]
+    return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
 
 
 # -----------------------------------------------------------------------
-# Create NOTAM briefing
-def make_briefing(filename, notams, hdr, date, map_extent, debug=False):
+# Create NOTAM briefing. filename is either a path or a writable binary
+# stream, which ReportLab writes to directly. If filename is None the
+# briefing is rendered in memory and the PDF data returned as bytes.
+# classified, if given, is the result of rules.classify for the date and
+# is used instead of notams. text_pages, if given, are the date's
+# non-plotted and other NOTAM pages from notamdoc.typeset_text_pages
+def make_briefing(
+    filename,
+    notams,
+    hdr,
+    date,
+    map_extent,
+    debug=False,
+    map_data=None,
+    rules=None,
+    spatial_index=None,
+    classified=None,
+    text_pages=None,
+):
+    # Render to memory and return the PDF data if no output is given
+    if filename is None:
+        buf = io.BytesIO()
+        make_briefing(
+            buf,
+            notams,
+            hdr,
+            date,
+            map_extent,
+            debug,
+            map_data,
+            rules,
+            spatial_index,
+            classified,
+            text_pages,
+        )
+        return buf.getvalue()
+
     # filter by date
-    notams = [n for n in notams if date_filter(n, date)]
-
-    # Get map data
-    source = files(navplot).joinpath("data/yaixm.geojson")
-    with as_file(source) as path:
-        with path.open() as f:
-            airspace_json = json.load(f)
-
-    source = files(navplot).joinpath("data/coast.geojson")
-    with as_file(source) as path:
-        with path.open() as f:
-            coast_json = json.load(f)
-
-    # Create PDF document
-    navplot.notamdoc.notamdoc(
-        filename, notams, hdr, date, map_extent, airspace_json, coast_json, debug
-    )
+    if classified is None:
+        notams = filter_notams(notams, date)
+
+    # Get map data, shared between briefings unless supplied by the caller
+    if map_data is None:
+        map_data = navplot.mapdata.get_map_data()
+
+    # Create PDF document, ReportLab is imported on the first render
+    from navplot import notamdoc
+
+    with navplot.instrument.span("make_briefing", date=date, extent=map_extent):
+        notamdoc.notamdoc(
+            filename,
+            notams,
+            hdr,
+            date,
+            map_extent,
+            map_data,
+            debug,
+            rules,
+            spatial_index,
+            classified,
+            text_pages,
+        )
+
+
+# -----------------------------------------------------------------------
+# Load map data and prepare the base maps for map_extents. None of this
+# depends on the NOTAMs, so it can be done while they are fetched.
+# Returns the map data
+def prepare_maps(map_extents, map_data=None):
+    if map_data is None:
+        map_data = navplot.mapdata.get_map_data()
+
+    from navplot import notamdoc
+
+    for map_extent in map_extents:
+        with navplot.instrument.span("prepare_map", extent=map_extent):
+            notamdoc.prepare_base_map(map_extent, map_data)
+
+    return map_data
+
+
+# Create several briefings from the same NOTAMs, rendering in parallel
+# worker processes. jobs is a list of (filename, date, map_extent) tuples.
+# Returns a dictionary of exceptions, keyed by filename, for failed jobs
+def make_briefings(jobs, notams, hdr, workers=None, debug=False, rules=None):
+    errors = {}
+    if not isinstance(notams, navplot.dateindex.DateIndex):
+        notams = navplot.dateindex.DateIndex(notams)
+
+    # Classify once, the categories are shared by all the briefings
+    if rules:
+        rules.apply(notams.notams)
+
+    spatial_index = navplot.spatial.SpatialIndex(notams.notams)
+
+    # Filter, sort and typeset the map independent pages once for each
+    # date, only the map dependent work is repeated for each briefing
+    from navplot import notamdoc
+
+    classified = {}
+    text_pages = {}
+    for _, date, _ in jobs:
+        if date not in classified:
+            classified[date] = navplot.rules.classify(
+                filter_notams(notams, date), debug
+            )
+            _, area_notams, boring_notams, _ = classified[date]
+            text_pages[date] = notamdoc.typeset_text_pages(area_notams, boring_notams)
+
+    if workers == 1:
+        for filename, date, map_extent in jobs:
+            try:
+                make_briefing(
+                    filename,
+                    None,
+                    hdr,
+                    date,
+                    map_extent,
+                    debug,
+                    spatial_index=spatial_index,
+                    classified=classified[date],
+                    text_pages=text_pages[date],
+                )
+            except Exception as e:
+                errors[filename] = e
+
+        return errors
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            filename: executor.submit(
+                make_briefing,
+                filename,
+                None,
+                hdr,
+                date,
+                map_extent,
+                debug,
+                spatial_index=spatial_index,
+                classified=classified[date],
+                text_pages=text_pages[date],
+            )
+            for filename, date, map_extent in jobs
+        }
+
+        for filename, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                errors[filename] = e
+
+    return errors
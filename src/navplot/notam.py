@@ -0,0 +1,122 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# NOTAM record. Values needed for classifying and plotting are derived
+# once, when the NOTAM is parsed.
+
+# Category of a NOTAM not yet classified. Distinct from None, which is a
+# NOTAM excluded from the briefing
+UNCLASSIFIED = "unclassified"
+
+
+class Notam:
+    __slots__ = (
+        "id",
+        "qline",
+        "start",
+        "end",
+        "schedule",
+        "lower",
+        "upper",
+        "text",
+        "lat",
+        "lon",
+        "radius",
+        "joined_text",
+        "display_text",
+        "category",
+    )
+
+    def __init__(
+        self, id, qline, start, end, text, schedule=None, lower=None, upper=None
+    ):
+        self.id = id
+        self.qline = qline
+        self.start = start
+        self.end = end
+        self.text = text
+        self.schedule = schedule
+        self.lower = lower
+        self.upper = upper
+
+        # Centre coordinates and radius (nm)
+        ctext = qline["centre"]
+        self.lat = int(ctext[:2]) + int(ctext[2:4]) / 60.0
+        self.lon = int(ctext[5:8]) + int(ctext[8:10]) / 60.0
+        if ctext[10] == "W":
+            self.lon = -self.lon
+        self.radius = int(qline["radius"])
+
+        # Text without white space, for matching phrases
+        self.joined_text = "".join(text.split())
+
+        # Description text for the briefing
+        to = "PERM" if end is None else end.strftime("%y/%m/%d %H:%M")
+        lines = [f"FROM: {start:%y/%m/%d %H:%M} TO: {to}", text]
+        if lower is not None:
+            lines.append(f"LOWER: {lower}")
+        if upper is not None:
+            lines.append(f"UPPER: {upper}")
+        if schedule is not None:
+            lines.append(f"SCHEDULE: {schedule}")
+        self.display_text = "\n".join(lines)
+
+        # Set by classification rules
+        self.category = UNCLASSIFIED
+
+    # Dictionary style access, as used before NOTAMs were Notam objects
+    _KEYS = {
+        "qline": "qline",
+        "from": "start",
+        "to": "end",
+        "schedule": "schedule",
+        "lower": "lower",
+        "upper": "upper",
+        "text": "text",
+    }
+
+    def __getitem__(self, key):
+        value = getattr(self, self._KEYS[key])
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in self._KEYS and getattr(self, self._KEYS[key]) is not None
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def _values(self):
+        return (
+            self.id,
+            self.qline,
+            self.start,
+            self.end,
+            self.text,
+            self.schedule,
+            self.lower,
+            self.upper,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Notam):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        return f"Notam({self.id!r}, {self.qline['qcode']}, {self.start}, {self.end})"
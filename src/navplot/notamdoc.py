@@ -15,13 +15,21 @@
 # You should have received a copy of the GNU General Public License
 # along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
 
+import array
 import math
 
+from reportlab import rl_config
 from reportlab.lib.units import mm
+from reportlab.pdfgen.pathobject import PDFPathObject
 from reportlab.lib.colors import darkgray, gray, lightgrey, blue, black, steelblue
 from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.platypus import SimpleDocTemplate, XPreformatted, Paragraph
-from reportlab.platypus import PageBreak, KeepTogether
+from reportlab.platypus import Flowable, PageBreak, KeepTogether
+
+import navplot.basemap
+import navplot.instrument
+from navplot.rules import classify
 
 # For plotting on the map
 GLIDING_SITES = {
@@ -44,31 +52,222 @@ RIGHT_MARGIN = 15 * mm
 TOP_MARGIN = 15 * mm
 BOTTOM_MARGIN = 10 * mm
 
+# Width (in degrees of longitude) of maps centred on a gliding site
+SITE_MAP_WIDTH = 2.5
+
+# Map line simplification tolerance (points), matches the precision of
+# the projected coordinates
+SIMPLIFY_TOLERANCE = 0.1
+
+# Fonts used in the briefings. They are registered in this order in every
+# document so the internal font names match between documents
+FONTS = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
+
+# Paragraph styles
+SUB_STYLE = ParagraphStyle(
+    "Sub",
+    fontName="Helvetica-Oblique",
+    fontSize=16,
+    spaceBefore=2 * mm,
+    spaceAfter=5 * mm,
+)
+
+NOTAM_STYLE = ParagraphStyle(
+    "Notam",
+    fontName="Helvetica",
+    fontSize=9,
+    bulletFontName="Helvetica-Bold",
+    bulletFontSize=10,
+    leftIndent=8 * mm,
+    spaceAfter=3 * mm,
+)
+
+OTHER_STYLE = ParagraphStyle(
+    "Other",
+    fontName="Helvetica",
+    fontSize=9,
+    bulletFontName="Helvetica-Bold",
+    bulletFontSize=10,
+    leftIndent=8 * mm,
+    spaceAfter=3 * mm,
+)
+
 
 # XPreformatted with added hyperlink
 class LinkedXPreformatted(XPreformatted):
-    def __init__(self, link, *args, **kwargs):
-        self.link = str(link)
+    def __init__(self, *args, link=None, **kwargs):
+        self.link = None if link is None else str(link)
         super().__init__(*args, **kwargs)
 
+    # Only the first part of a split paragraph is linked
+    def split(self, availWidth, availHeight):
+        parts = super().split(availWidth, availHeight)
+        if parts:
+            parts[0].link = self.link
+        return parts
+
     def drawOn(self, canvas, x, y, _sW=0):
         super().drawOn(canvas, x, y, _sW)
-        top = y + self.height + (5 * mm)
-        canvas.bookmarkPage(self.link, fit="XYZ", left=x, top=top)
+        if self.link is not None:
+            top = y + self.height + (5 * mm)
+            canvas.bookmarkPage(self.link, fit="XYZ", left=x, top=top)
+
+
+# List of NOTAM paragraphs, laid out as if each were in its own KeepTogether.
+# Each entry is measured once and the list split directly at the last
+# entry fitting the frame, rather than Platypus wrapping and splitting
+# every entry in turn. Split lists share the entries and measurements
+class NotamList(Flowable):
+    def __init__(self, entries, start=0, end=None, layout=None):
+        self.entries = entries
+        self.start = start
+        self.end = len(entries) if end is None else end
+        self.layout = {} if layout is None else layout
+
+    # Measure entries, returns widths, heights, space after and offset of
+    # each entry from the top of the list
+    def _measure(self, availWidth):
+        layout = self.layout
+        if layout.get("availWidth") != availWidth:
+            widths = []
+            heights = []
+            spaces = []
+            offsets = [0]
+            for e in self.entries:
+                w, h = e.wrapOn(self.canv, availWidth, 0x7FFFFFFF)
+                widths.append(w)
+                heights.append(h)
+                spaces.append(e.getSpaceAfter())
+                offsets.append(offsets[-1] + h + spaces[-1])
+
+            layout.update(
+                availWidth=availWidth,
+                widths=widths,
+                heights=heights,
+                spaces=spaces,
+                offsets=offsets,
+            )
+
+        return layout
+
+    def wrap(self, availWidth, availHeight):
+        layout = self._measure(availWidth)
+        offsets = layout["offsets"]
+        self.width = availWidth
+        self.height = (
+            offsets[self.end] - offsets[self.start] - layout["spaces"][self.end - 1]
+        )
+        return self.width, self.height
+
+    def getSpaceBefore(self):
+        return self.entries[self.start].getSpaceBefore()
+
+    def getSpaceAfter(self):
+        return self.entries[self.end - 1].getSpaceAfter()
+
+    def split(self, availWidth, availHeight):
+        layout = self._measure(availWidth)
+        heights = layout["heights"]
+        offsets = layout["offsets"]
+
+        # Number of whole entries fitting the available height
+        top = offsets[self.start]
+        limit = availHeight + rl_config._FUZZ
+        n = self.start
+        while n < self.end and offsets[n] - top + heights[n] <= limit:
+            n += 1
+
+        if n == self.start:
+            # Entry too tall for a whole frame is split, otherwise try
+            # the next frame
+            frame = getattr(self, "_frame", None)
+            if frame is None or not frame._atTop:
+                return []
+
+            parts = self.entries[n].splitOn(self.canv, availWidth, availHeight)
+            if self.end - n > 1:
+                parts.append(NotamList(self.entries, n + 1, self.end, self.layout))
+            return parts
+
+        return [
+            NotamList(self.entries, self.start, n, self.layout),
+            NotamList(self.entries, n, self.end, self.layout),
+        ]
+
+    # Draw entries top down, positioned as a frame would
+    def drawOn(self, canvas, x, y, _sW=0):
+        layout = self.layout
+        widths = layout["widths"]
+        heights = layout["heights"]
+        spaces = layout["spaces"]
+
+        y += self.height
+        for i in range(self.start, self.end):
+            y -= heights[i]
+            self.entries[i].drawOn(canvas, x, y, _sW=self.width - widths[i])
+            y -= spaces[i]
+
+
+# ------------------------------------------------------------------------------
+# Canvas with the briefing fonts registered in a fixed order
+class BriefingCanvas(Canvas):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for font in FONTS:
+            self._doc.getInternalFontName(font)
+
+
+# Canvas keeping the content of each page instead of writing a PDF
+class RecordingCanvas(BriefingCanvas):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pages = []
+
+    def showPage(self):
+        self.pages.append("\n".join(self._code))
+        super().showPage()
+
+    def save(self):
+        pass
+
+
+# Pages typeset once and copied into each briefing for the date. fonts is
+# the internal font name mapping the content was drawn with
+class TextPages:
+    def __init__(self, pages, fonts):
+        self.pages = pages
+        self.fonts = fonts
+
+
+# Whole page of previously typeset content
+class TextPage(Flowable):
+    def __init__(self, content, fonts):
+        self.content = content
+        self.fonts = fonts
+
+    def wrap(self, availWidth, availHeight):
+        return availWidth, availHeight
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        # Content refers to fonts by their internal names
+        for font, name in self.fonts.items():
+            if canvas._doc.getInternalFontName(font) != name:
+                raise ValueError(f"Font {font} has different name in text pages")
+
+        canvas.addLiteral(self.content)
 
 
 # ------------------------------------------------------------------------------
 # Reportlab Platypus template
 class DocTemplate(SimpleDocTemplate):
-    def __init__(self, filename, dt, notams, mapinfo, airspace_json, coast_json, **kw):
+    def __init__(self, filename, dt, notams, mapinfo, map_data, **kw):
         SimpleDocTemplate.__init__(self, filename, **kw)
         self.lat0 = mapinfo[0]
         self.lon0 = mapinfo[1]
         self.notams = notams
         self.date = dt
         self.bottomOffset = 5 * mm
-        self.coast_json = coast_json
-        self.airspace_json = airspace_json
+        self.map_data = map_data
 
         self.mapwidth = self.pagesize[0] - self.rightMargin - self.leftMargin
         self.mapheight = (
@@ -82,12 +281,274 @@ class DocTemplate(SimpleDocTemplate):
 
     # Convert lat/lon coordinates to page coordinates
     def latlon2xy(self, lat, lon):
-        x = self.leftMargin + (lon - self.lon0) * self.scale * math.cos(
-            math.radians(lat)
-        )
-        y = self.bottomMargin + self.bottomOffset + (lat - self.lat0) * self.scale
+        xs, ys = self.project((lon,), (lat,))
+        return xs[0], ys[0]
+
+    # Convert arrays of lon and lat coordinates to arrays of page x and y
+    # coordinates. The cosines of the latitudes can be supplied if known
+    def project(self, lons, lats, coslats=None):
+        x0 = self.leftMargin
+        y0 = self.bottomMargin + self.bottomOffset
+        lon0 = self.lon0
+        lat0 = self.lat0
+        scale = self.scale
+
+        if coslats is None:
+            cos = math.cos
+            radians = math.radians
+            coslats = [cos(radians(lat)) for lat in lats]
+
         # Reducing precision reduces output file size
-        return int(x * 10) / 10, int(y * 10) / 10
+        xs = array.array(
+            "d",
+            [
+                int((x0 + (lon - lon0) * scale * c) * 10) / 10
+                for lon, c in zip(lons, coslats)
+            ],
+        )
+        ys = array.array(
+            "d", [int((y0 + (lat - lat0) * scale) * 10) / 10 for lat in lats]
+        )
+
+        return xs, ys
+
+    # Lat/lon box containing the map
+    def extent(self):
+        lat_max = self.lat0 + self.mapheight / self.scale
+        cos_min = math.cos(math.radians(lat_max))
+        lon_max = self.lon0 + self.mapwidth / (self.scale * cos_min)
+        return self.lat0, lat_max, self.lon0, lon_max
+
+    # For each (lat, lon, radius) NOTAM area, whether its circle overlaps the
+    # map
+    def onMap(self, coords):
+        xs, ys = self.project([c[1] for c in coords], [c[0] for c in coords])
+
+        x0 = self.leftMargin
+        x1 = x0 + self.mapwidth
+        y0 = self.bottomMargin + self.bottomOffset
+        y1 = y0 + self.mapheight
+
+        visible = []
+        for c, x, y in zip(coords, xs, ys):
+            # Distance from circle centre to nearest point of the map
+            dx = x - min(max(x, x0), x1)
+            dy = y - min(max(y, y0), y1)
+            radius = c[2] / 60.0 * self.scale
+            visible.append(dx * dx + dy * dy <= radius * radius)
+
+        return visible
+
+
+# ------------------------------------------------------------------------------
+# Map extent (lat, lon, scale) for a map of given width centred on lat/lon
+def site_extent(lat, lon, width=SITE_MAP_WIDTH):
+    doc = DocTemplate(
+        None,
+        None,
+        [],
+        (lat, lon, width),
+        None,
+        leftMargin=LEFT_MARGIN,
+        rightMargin=RIGHT_MARGIN,
+        bottomMargin=BOTTOM_MARGIN,
+        topMargin=TOP_MARGIN,
+    )
+
+    # Scale depends on the latitude of the map origin, so iterate
+    lat0 = lat
+    for _ in range(5):
+        scale = doc.mapwidth / (width * math.cos(math.radians(lat0)))
+        lat0 = lat - doc.mapheight / scale / 2
+
+    lon0 = lon - doc.mapwidth / 2 / (scale * math.cos(math.radians(lat)))
+    return lat0, lon0, width
+
+
+# ------------------------------------------------------------------------------
+# Douglas-Peucker line simplification, returns indices of points to keep
+def simplify(xs, ys, tolerance):
+    n = len(xs)
+    if n < 3 or tolerance <= 0:
+        return range(n)
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tolerance * tolerance
+
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = xs[first], ys[first]
+        dx, dy = xs[last] - x1, ys[last] - y1
+        d2 = dx * dx + dy * dy
+
+        # Squared distance of intermediate points from line (or from the
+        # first point if the ends coincide) scaled by d2
+        seg = zip(xs[first + 1 : last], ys[first + 1 : last])
+        if d2 == 0:
+            d2 = 1
+            dists = [(x - x1) ** 2 + (y - y1) ** 2 for x, y in seg]
+        else:
+            dists = [(dx * (y - y1) - dy * (x - x1)) ** 2 for x, y in seg]
+
+        dmax = max(dists)
+        imax = first + 1 + dists.index(dmax)
+
+        if dmax > tol2 * d2:
+            keep[imax] = True
+            if imax - first > 1:
+                stack.append((first, imax))
+            if last - imax > 1:
+                stack.append((imax, last))
+
+    return [i for i in range(n) if keep[i]]
+
+
+# ------------------------------------------------------------------------------
+# Add map layer rings to path. Rings outside the map are dropped and the
+# remainder simplified to the output resolution
+def layerPath(doc, layer):
+    path = PDFPathObject()
+    lons = layer.lons
+    lats = layer.lats
+    coslats = layer.coslats()
+
+    x0 = doc.leftMargin
+    x1 = x0 + doc.mapwidth
+    y0 = doc.bottomMargin + doc.bottomOffset
+    y1 = y0 + doc.mapheight
+
+    # Rings well outside the map are dropped without projecting them. The
+    # one point margin allows for rounding of the projected coordinates
+    lat_min, lat_max, lon_min, lon_max = doc.extent()
+    pad = 1 / (doc.scale * math.cos(math.radians(lat_max)))
+    lat_min, lat_max = lat_min - pad, lat_max + pad
+    lon_min, lon_max = lon_min - pad, lon_max + pad
+
+    for (start, end), (w, e, s, n) in zip(layer.spans(), layer.bounds()):
+        if w > lon_max or e < lon_min or s > lat_max or n < lat_min:
+            continue
+
+        rxs, rys = doc.project(lons[start:end], lats[start:end], coslats[start:end])
+        if min(rxs) > x1 or max(rxs) < x0 or min(rys) > y1 or max(rys) < y0:
+            continue
+
+        idx = iter(simplify(rxs, rys, SIMPLIFY_TOLERANCE))
+        i = next(idx)
+        path.moveTo(rxs[i], rys[i])
+        for i in idx:
+            path.lineTo(rxs[i], rys[i])
+
+    return path
+
+
+# ------------------------------------------------------------------------------
+# Get base map path code, cached by map extent and map data version
+def baseMapPaths(doc):
+    key = navplot.basemap.cache_key(
+        doc.map_data,
+        doc.lat0,
+        doc.lon0,
+        doc.scale,
+        doc.leftMargin,
+        doc.bottomMargin + doc.bottomOffset,
+        doc.mapwidth,
+        doc.mapheight,
+        SIMPLIFY_TOLERANCE,
+    )
+
+    paths = navplot.basemap.get(key)
+    if paths is None:
+        paths = {}
+        for name in ("coast", "airspace"):
+            with navplot.instrument.span("layer", layer=name):
+                layer = getattr(doc.map_data, name)
+                paths[name] = layerPath(doc, layer).getCode()
+        navplot.basemap.put(key, paths)
+
+    return paths
+
+
+# Compute and cache the base map for a map extent ahead of the first
+# briefing using it
+def prepare_base_map(mapinfo, map_data):
+    doc = DocTemplate(
+        None,
+        None,
+        [],
+        mapinfo,
+        map_data,
+        leftMargin=LEFT_MARGIN,
+        rightMargin=RIGHT_MARGIN,
+        bottomMargin=BOTTOM_MARGIN,
+        topMargin=TOP_MARGIN,
+    )
+    baseMapPaths(doc)
+
+
+# ------------------------------------------------------------------------------
+# Draw the static base map (coast line, airspace and gliding sites) as a
+# form XObject
+def drawBaseMap(canvas, doc):
+    paths = baseMapPaths(doc)
+
+    canvas.beginForm("basemap")
+
+    # Drawing style for the map
+    canvas.setLineWidth(0.5)
+    canvas.setFillColor(gray)
+    canvas.setFont("Helvetica", 10)
+
+    # Draw coast line
+    canvas.setStrokeColor(steelblue)
+    if paths["coast"]:
+        canvas.addLiteral(paths["coast"])
+        canvas.addLiteral("S")
+
+    # Draw airspace
+    canvas.setStrokeColor(darkgray)
+    if paths["airspace"]:
+        canvas.addLiteral(paths["airspace"])
+        canvas.addLiteral("S")
+
+    # Draw some gliding sites
+    canvas.setStrokeColor(gray)
+    delta = 2.5 * mm
+    lats, lons = zip(*GLIDING_SITES.values())
+    xs, ys = doc.project(lons, lats)
+    for gs, x, y in zip(GLIDING_SITES, xs, ys):
+        canvas.lines(((x, y + delta, x, y - delta), (x - delta, y, x + delta, y)))
+        canvas.drawString(x + mm, y + mm, gs)
+
+    canvas.endForm()
+
+
+# ------------------------------------------------------------------------------
+# Draw numbered and hyperlinked NOTAM areas
+def drawNotams(canvas, doc):
+    canvas.setStrokeColor(blue)
+    canvas.setFillColor(black)
+    canvas.setLineWidth(0.5)
+    xs, ys = doc.project([n[1] for n in doc.notams], [n[0] for n in doc.notams])
+    for n, (notam, x, y) in enumerate(zip(doc.notams, xs, ys)):
+        radius = notam[2] / 60.0 * doc.scale
+        canvas.circle(x, y, radius)
+        if radius / mm < 3:
+            x1 = x + radius / 1.41 + mm / 2
+            y1 = y + radius / 1.41 + mm / 2
+            canvas.line(x, y, x1, y1)
+            canvas.drawString(x1, y1, str(n + 1))
+        else:
+            canvas.drawCentredString(x, y - 3, str(n + 1))
+
+        # Add hyperlink
+        canvas.linkAbsolute(
+            "",
+            str(n),
+            (x - (4 * mm), y - (4 * mm), x + (4 * mm), y + (4 * mm)),
+            Border="[0 0 0]",
+        )
 
 
 # ------------------------------------------------------------------------------
@@ -136,73 +597,72 @@ def drawFirstPage(canvas, doc):
     )
     canvas.clipPath(path)
 
-    # Drawing style for the map
-    canvas.setLineWidth(0.5)
-    canvas.setFillColor(gray)
-
-    # Draw coast line
-    path = canvas.beginPath()
+    # Draw base map
+    with navplot.instrument.span("draw_basemap"):
+        drawBaseMap(canvas, doc)
+        canvas.doForm("basemap")
 
-    for f in doc.coast_json["features"]:
-        coast = [doc.latlon2xy(x[1], x[0]) for x in f["geometry"]["coordinates"][0]]
+    # Draw NOTAM areas
+    with navplot.instrument.span("draw_notams", notams=len(doc.notams)):
+        drawNotams(canvas, doc)
 
-        path.moveTo(coast[0][0], coast[0][1])
-        for xy in coast[1:]:
-            path.lineTo(xy[0], xy[1])
+    canvas.restoreState()
 
-    canvas.setStrokeColor(steelblue)
-    canvas.drawPath(path)
 
-    # Draw airspace
-    path = canvas.beginPath()
+# ------------------------------------------------------------------------------
+# Non-plotted and other NOTAM sections. They don't depend on the map so are
+# the same for every briefing for the date
+def textStory(area_notams, boring_notams):
+    story = []
+    if area_notams:
+        paras = [
+            XPreformatted(n, OTHER_STYLE, bulletText="\N{BULLET}") for n in area_notams
+        ]
 
-    for f in doc.airspace_json["features"]:
-        coast = [doc.latlon2xy(x[1], x[0]) for x in f["geometry"]["coordinates"][0]]
+        head = "<b>Non-Plotted Navigation Warnings</b> (Radius > 30nm)"
+        story.append(KeepTogether([Paragraph(head, SUB_STYLE), paras[0]]))
+        if paras[1:]:
+            story.append(NotamList(paras[1:]))
 
-        path.moveTo(coast[0][0], coast[0][1])
-        for xy in coast[1:]:
-            path.lineTo(xy[0], xy[1])
+    if boring_notams:
+        paras = [
+            XPreformatted(n, OTHER_STYLE, bulletText="\N{BULLET}")
+            for n in boring_notams
+        ]
 
-    canvas.setStrokeColor(darkgray)
-    canvas.drawPath(path)
+        head = "<b>All Other Navigation Warnings</b> (Sorted South to North)"
+        story.append(KeepTogether([Paragraph(head, SUB_STYLE), paras[0]]))
+        if paras[1:]:
+            story.append(NotamList(paras[1:]))
 
-    # Draw some gliding sites
-    canvas.setStrokeColor(gray)
-    delta = 2.5 * mm
-    for gs in GLIDING_SITES:
-        x, y = doc.latlon2xy(*GLIDING_SITES[gs])
-        canvas.lines(((x, y + delta, x, y - delta), (x - delta, y, x + delta, y)))
-        canvas.drawString(x + mm, y + mm, gs)
+    return story
 
-    # Draw NOTAM areas
-    canvas.setStrokeColor(blue)
-    canvas.setFillColor(black)
-    canvas.setLineWidth(0.5)
-    for n, notam in enumerate(doc.notams):
-        x, y = doc.latlon2xy(notam[0], notam[1])
-        radius = notam[2] / 60.0 * doc.scale
-        canvas.circle(x, y, radius)
-        if radius / mm < 3:
-            x1 = x + radius / 1.41 + mm / 2
-            y1 = y + radius / 1.41 + mm / 2
-            canvas.line(x, y, x1, y1)
-            canvas.drawString(x1, y1, str(n + 1))
-        else:
-            canvas.drawCentredString(x, y - 3, str(n + 1))
 
-        # Add hyperlink
-        canvas.linkAbsolute(
-            "",
-            str(n),
-            (x - (4 * mm), y - (4 * mm), x + (4 * mm), y + (4 * mm)),
-            Border="[0 0 0]",
-        )
+# ------------------------------------------------------------------------------
+# Typeset the non-plotted and other NOTAM pages, for sharing between the
+# briefings for a date
+def typeset_text_pages(area_notams, boring_notams):
+    story = textStory(area_notams, boring_notams)
+    if not story:
+        return TextPages([], {})
+
+    doc = SimpleDocTemplate(
+        None,
+        leftMargin=LEFT_MARGIN,
+        rightMargin=RIGHT_MARGIN,
+        bottomMargin=BOTTOM_MARGIN,
+        topMargin=TOP_MARGIN,
+    )
+    with navplot.instrument.span("typeset_text_pages"):
+        doc.build(story, canvasmaker=RecordingCanvas)
 
-    canvas.restoreState()
+    return TextPages(doc.canv.pages, dict(doc.canv._doc.fontMapping))
 
 
 # ------------------------------------------------------------------------------
-# Produce NOTAM document
+# Produce NOTAM document, filename can be a path or a writable binary stream.
+# The non-plotted and other NOTAMs are typeset here unless already typeset
+# in text_pages
 def format_doc(
     filename,
     local_notams,
@@ -212,17 +672,17 @@ def format_doc(
     header,
     date,
     mapinfo,
-    airspace_json,
-    coast_json,
+    map_data,
+    spatial_index=None,
+    text_pages=None,
 ):
-    # Define Platypus template and paragraph styles
+    # Define Platypus template
     doc = DocTemplate(
         filename,
         date,
         local_coords,
         mapinfo,
-        airspace_json,
-        coast_json,
+        map_data,
         leftMargin=LEFT_MARGIN,
         rightMargin=RIGHT_MARGIN,
         bottomMargin=BOTTOM_MARGIN,
@@ -231,42 +691,31 @@ def format_doc(
         author="Freeflight",
     )
 
-    subStyle = ParagraphStyle(
-        "Sub",
-        fontName="Helvetica-Oblique",
-        fontSize=16,
-        spaceBefore=2 * mm,
-        spaceAfter=5 * mm,
-    )
+    # Only plot and number NOTAMs which appear on the map, the others are
+    # still listed (unnumbered) after them. The spatial index (if given)
+    # saves testing NOTAMs well away from the map
+    if spatial_index:
+        nearby = spatial_index.query(*doc.extent())
+        near = [c[3] in nearby for c in local_coords]
+    else:
+        near = [True] * len(local_coords)
 
-    notamStyle = ParagraphStyle(
-        "Notam",
-        fontName="Helvetica",
-        fontSize=9,
-        bulletFontName="Helvetica-Bold",
-        bulletFontSize=10,
-        leftIndent=8 * mm,
-        spaceAfter=3 * mm,
-    )
+    local = [(t, c) for t, c, n in zip(local_notams, local_coords, near) if n]
+    visible = iter(doc.onMap([c for _, c in local]))
+    on_map = [n and next(visible) for n in near]
 
-    otherStyle = ParagraphStyle(
-        "Other",
-        fontName="Helvetica",
-        fontSize=9,
-        bulletFontName="Helvetica-Bold",
-        bulletFontSize=10,
-        leftIndent=8 * mm,
-        spaceAfter=3 * mm,
-    )
+    off_map_notams = [t for t, v in zip(local_notams, on_map) if not v]
+    doc.notams = [c for c, v in zip(local_coords, on_map) if v]
+    local_notams = [t for t, v in zip(local_notams, on_map) if v]
 
     # Generate the NOTAM document.
     story = []
     story.append(PageBreak())
 
-    story.append(Paragraph("<b>NOTAM Header</b>", subStyle))
+    story.append(Paragraph("<b>NOTAM Header</b>", SUB_STYLE))
     h = "\n".join([hl for hl in header.splitlines() if hl])
-    story.append(XPreformatted(h, otherStyle))
-    story.append(Paragraph("<b>Plotted Navigation Warnings</b>", subStyle))
+    story.append(XPreformatted(h, OTHER_STYLE))
+    story.append(Paragraph("<b>Plotted Navigation Warnings</b>", SUB_STYLE))
     story.append(
         Paragraph(
             "Plotted Navigation Warnings are Restrictions of all types except <i>Overflight</i>, "
@@ -276,104 +725,65 @@ def format_doc(
             "Materials and Toxic Chemicals</i>. Also plotted are activation or "
             "installation of Airspace types <i>CTZ</i>, <i>CTA</i>, <i>ATS "
             "route</i>, <i>TMA</i> and <i>ATZ</i>",
-            otherStyle,
+            OTHER_STYLE,
         )
     )
-    for n, notam in enumerate(local_notams):
+    if local_notams:
         story.append(
-            KeepTogether(
-                LinkedXPreformatted(n, notam, notamStyle, bulletText=str(n + 1))
+            NotamList(
+                [
+                    LinkedXPreformatted(
+                        notam, NOTAM_STYLE, bulletText=str(n + 1), link=n
+                    )
+                    for n, notam in enumerate(local_notams)
+                ]
             )
         )
 
-    if area_notams:
+    if off_map_notams:
         paras = [
-            XPreformatted(n, otherStyle, bulletText="\N{BULLET}") for n in area_notams
+            XPreformatted(n, NOTAM_STYLE, bulletText="\N{BULLET}")
+            for n in off_map_notams
         ]
 
-        head = "<b>Non-Plotted Navigation Warnings</b> (Radius > 30nm)"
-        story.append(KeepTogether([Paragraph(head, subStyle), paras[0]]))
-        for p in paras[1:]:
-            story.append(KeepTogether(p))
-
-    if boring_notams:
-        paras = [
-            XPreformatted(n, otherStyle, bulletText="\N{BULLET}") for n in boring_notams
-        ]
+        head = "<b>Plotted Navigation Warnings Outside this Map</b>"
+        story.append(KeepTogether([Paragraph(head, SUB_STYLE), paras[0]]))
+        if paras[1:]:
+            story.append(NotamList(paras[1:]))
 
-        head = "<b>All Other Navigation Warnings</b> (Sorted South to North)"
-        story.append(KeepTogether([Paragraph(head, subStyle), paras[0]]))
-        for p in paras[1:]:
-            story.append(KeepTogether(p))
+    # Non-plotted and other NOTAMs start on a new page, so their pages are
+    # the same in every briefing
+    if text_pages is None:
+        text_story = textStory(area_notams, boring_notams)
+        if text_story:
+            story.append(PageBreak())
+            story.extend(text_story)
+    else:
+        for page in text_pages.pages:
+            story.append(PageBreak())
+            story.append(TextPage(page, text_pages.fonts))
 
-    doc.build(story, onFirstPage=drawFirstPage)
+    with navplot.instrument.span("doc.build"):
+        doc.build(story, onFirstPage=drawFirstPage, canvasmaker=BriefingCanvas)
 
 
 # ------------------------------------------------------------------------------
 def notamdoc(
-    filename, notams, header, date, mapinfo, airspace_json, coast_json, debug=False
+    filename,
+    notams,
+    header,
+    date,
+    mapinfo,
+    map_data,
+    debug=False,
+    rules=None,
+    spatial_index=None,
+    classified=None,
+    text_pages=None,
 ):
-    # Sort by latitude of area centre
-    notams.sort(key=lambda x: int(x["qline"]["centre"][:4]))
-
-    # NOTAMS are split into three categories - localNotams have an
-    # "interesting" subject with a radius <=30nm. These are the ones that are
-    # plotted on the map.
-    # areaNotams are also "interesting" but have radius >30nm.
-    # boringNotams have an "uninteresting" subject (e.g. kite flying)
-    interesting_notams = []
-    area_notams = []
-    boring_notams = []
-    interesting_coords = []
-    for n in notams:
-        # NOTAM description text
-        notam_text = "FROM: %s" % n["from"].strftime("%y/%m/%d %H:%M")
-        to = "PERM" if "to" not in n else n["to"].strftime("%y/%m/%d %H:%M")
-        notam_text += " TO: %s\n" % to
-
-        notam_text += n["text"]
-        if "lower" in n:
-            notam_text += "\nLOWER: %s" % n["lower"]
-
-        if "upper" in n:
-            notam_text += "\nUPPER: %s" % n["upper"]
-
-        if "schedule" in n:
-            notam_text += "\nSCHEDULE: %s" % n["schedule"]
-
-        if debug:
-            notam_text += f"\nQCODE: {n['qline']['qcode']}"
-
-        # Sort into interesting, area & boring categories
-        qc = n["qline"]["qcode"]
-        joined_text = "".join(n["text"].split())
-        if (
-            (
-                qc[1] == "R"
-                and qc[2] != "O"
-                and "ACTIVEFORUASONLY" not in joined_text
-                and "INSTALLEDFORUASONLY" not in joined_text
-                and "APPLICABLETOUASONLY" not in joined_text
-            )
-            or (qc[1] == "W" and qc[2] in "ABGMPR")
-            or (qc[1] == "A" and qc[2] in "CERTZ" and qc[3:5] in ["CA", "CS"])
-            or (qc[1:5] == "AFXX")
-        ):
-            if int(n["qline"]["radius"]) > 30 and qc[1:3] != "RT":
-                area_notams.append(notam_text)
-            else:
-                interesting_notams.append(notam_text)
-
-                # Coordinates for map
-                ctext = n["qline"]["centre"]
-                lat = int(ctext[:2]) + int(ctext[2:4]) / 60.0
-                lon = int(ctext[5:8]) + int(ctext[8:10]) / 60.0
-                if ctext[10] == "W":
-                    lon = -lon
-                rad = int(n["qline"]["radius"])
-                interesting_coords.append((lat, lon, rad))
-        elif qc[1] in "RW":
-            boring_notams.append(notam_text)
+    if classified is None:
+        classified = classify(notams, debug, rules)
+    interesting_notams, area_notams, boring_notams, interesting_coords = classified
 
     format_doc(
         filename,
@@ -384,6 +794,7 @@ def notamdoc(
         header,
         date,
         mapinfo,
-        airspace_json,
-        coast_json,
+        map_data,
+        spatial_index,
+        text_pages,
     )
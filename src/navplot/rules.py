@@ -0,0 +1,185 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# NOTAM classification rules.
+#
+# NOTAMs are sorted into categories:
+#   local - "interesting" subject with radius <= area_radius, plotted on
+#           the map
+#   area - "interesting" subject with a larger radius
+#   boring - "uninteresting" subject (e.g. kite flying)
+#   None - not included in the briefing
+#
+# Rules are tried in order and the first match decides. A rule matches if
+# the Q-code (without the leading Q) starts with one of its qcode
+# prefixes and, if it has any, one of its text phrases appears in the
+# NOTAM text (ignoring white space). Rule category "plot" gives local or
+# area depending on radius.
+
+import json
+
+from navplot.instrument import span
+from navplot.notam import UNCLASSIFIED
+
+# Rule categories, None excludes matching NOTAMs from the briefing
+CATEGORIES = ("plot", "local", "area", "boring", None)
+
+DEFAULT_RULES = {
+    "area_radius": 30,
+    # Q-code prefixes which are never area NOTAMs
+    "always_local": ["RT"],
+    "rules": [
+        # Restrictions, except overflight and UAS only
+        {"qcode": ["RO"], "category": "boring"},
+        {
+            "qcode": ["R"],
+            "text": ["ACTIVEFORUASONLY", "INSTALLEDFORUASONLY", "APPLICABLETOUASONLY"],
+            "category": "boring",
+        },
+        {"qcode": ["R"], "category": "plot"},
+        # Air display, aerobatics, gliding, firing, parachuting and
+        # radioactive/toxic warnings
+        {"qcode": ["WA", "WB", "WG", "WM", "WP", "WR"], "category": "plot"},
+        {"qcode": ["W"], "category": "boring"},
+        # CTZ, CTA, ATS route, TMA and ATZ activation/installation
+        {
+            "qcode": [
+                "ACCA",
+                "ACCS",
+                "AECA",
+                "AECS",
+                "ARCA",
+                "ARCS",
+                "ATCA",
+                "ATCS",
+                "AZCA",
+                "AZCS",
+            ],
+            "category": "plot",
+        },
+        {"qcode": ["AFXX"], "category": "plot"},
+    ],
+}
+
+
+class RuleSet:
+    def __init__(self, rules=DEFAULT_RULES):
+        self.area_radius = rules["area_radius"]
+        self.always_local = tuple(rules.get("always_local", []))
+
+        self.rules = []
+        for rule in rules["rules"]:
+            qcodes = tuple(rule["qcode"])
+            text = tuple(rule.get("text", []))
+            if rule["category"] not in CATEGORIES:
+                raise ValueError(f"Unknown NOTAM category {rule['category']!r}")
+            self.rules.append((qcodes, text, rule["category"]))
+
+        # Q-code -> applicable (text, category) rules, filled on demand
+        self._compiled = {}
+
+    # Rules for a Q-code, stopping at the first one without text phrases
+    # since it always matches
+    def _compile(self, qc):
+        compiled = []
+        for qcodes, text, category in self.rules:
+            if qc.startswith(qcodes):
+                compiled.append((text, category))
+                if not text:
+                    break
+
+        local = qc.startswith(self.always_local)
+        self._compiled[qc] = (tuple(compiled), local)
+        return self._compiled[qc]
+
+    # Category of a NOTAM
+    def category(self, notam):
+        qc = notam.qline["qcode"][1:]
+        rules, local = self._compiled.get(qc) or self._compile(qc)
+
+        for text, category in rules:
+            if not text or any(t in notam.joined_text for t in text):
+                if category == "plot":
+                    if notam.radius > self.area_radius and not local:
+                        return "area"
+                    else:
+                        return "local"
+                return category
+
+        return None
+
+    # Set the category of each NOTAM
+    def apply(self, notams):
+        for n in notams:
+            n.category = self.category(n)
+
+
+DEFAULT_RULESET = RuleSet()
+
+
+# -----------------------------------------------------------------------
+# Load rule set from JSON file, in the same format as DEFAULT_RULES
+def load_rules(filename):
+    with open(filename) as f:
+        return RuleSet(json.load(f))
+
+
+# -----------------------------------------------------------------------
+# Sort and classify NOTAMs, returns the text of the local, area and boring
+# NOTAMs and the (lat, lon, radius, id) of the local NOTAMs. NOTAMs are
+# classified with rules if given, otherwise their existing category is used
+# (with the default rules for any not yet classified)
+def classify(notams, debug=False, rules=None):
+    with span("classify", notams=len(notams)):
+        return _classify(notams, debug, rules)
+
+
+def _classify(notams, debug, rules):
+    # Sort by latitude of area centre
+    notams.sort(key=lambda x: x.lat)
+
+    interesting_notams = []
+    area_notams = []
+    boring_notams = []
+    interesting_coords = []
+    for n in notams:
+        if rules:
+            category = rules.category(n)
+        else:
+            category = n.category
+            if category == UNCLASSIFIED:
+                category = DEFAULT_RULESET.category(n)
+
+        if category is None:
+            continue
+
+        # NOTAM description text
+        notam_text = n.display_text
+        if debug:
+            notam_text += f"\nQCODE: {n.qline['qcode']}"
+
+        if category == "local":
+            interesting_notams.append(notam_text)
+
+            # Coordinates for map
+            interesting_coords.append((n.lat, n.lon, n.radius, n.id))
+        elif category == "area":
+            area_notams.append(notam_text)
+        else:
+            boring_notams.append(notam_text)
+
+    return interesting_notams, area_notams, boring_notams, interesting_coords
@@ -0,0 +1,139 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Logged in NATS website sessions, kept between runs so a briefing can be
+# generated without logging in and selecting FIRs again. Each session is
+# the cookie jar and the area briefing page (with its JSF view state)
+# after the FIRs were added. The website keeps the FIRs on the session, so
+# a session is only reused for the same FIRs.
+#
+# Passwords are never stored, but the session cookies give access to the
+# website so the file is only readable by its owner and is ignored if
+# anyone else can read it. Sessions are keyed by a hash of the website,
+# username and FIRs.
+
+import datetime
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+
+# Sessions idle for longer than this are assumed to have expired on the
+# server and are discarded without trying them
+SESSION_MAX_IDLE = datetime.timedelta(minutes=20)
+
+
+# -----------------------------------------------------------------------
+# Browser cookies and the area briefing page (HTML and URL), as a JSON
+# serialisable dict
+def browser_state(browser, page, url):
+    cookies = [
+        {
+            "name": c.name,
+            "value": c.value,
+            "domain": c.domain,
+            "path": c.path,
+            "secure": c.secure,
+            "expires": c.expires,
+            "rest": c._rest,
+        }
+        for c in browser.session.cookies
+    ]
+    return {"cookies": cookies, "page": page, "url": url}
+
+
+# Restore browser cookies and page from browser_state
+def restore_browser(browser, state):
+    for c in state["cookies"]:
+        browser.session.cookies.set(**c)
+    browser.open_fake_page(state["page"], state["url"])
+
+
+# -----------------------------------------------------------------------
+# File of stored sessions. A session is checked out while in use, so
+# concurrent fetches each get their own
+class SessionStore:
+    def __init__(self, filename, max_idle=SESSION_MAX_IDLE):
+        self.filename = filename
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+
+    # Session key, so the store doesn't hold usernames
+    @staticmethod
+    def key(username, base_url, firs):
+        text = f"{base_url}\n{username}\n{' '.join(firs)}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _read(self):
+        try:
+            with open(self.filename) as f:
+                if os.fstat(f.fileno()).st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+                    return []
+                return json.load(f)["sessions"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    # Replace the store, the new file is created owner read/write only
+    def _write(self, sessions):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".session-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"sessions": sessions}, f)
+            os.replace(tmp, self.filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    # Remove and return the most recently used session for username and
+    # firs, or None if there isn't one
+    def checkout(self, username, base_url, firs):
+        key = self.key(username, base_url, firs)
+        oldest = datetime.datetime.now(datetime.UTC) - self.max_idle
+
+        with self.lock:
+            sessions = self._read()
+            live = [
+                s
+                for s in sessions
+                if datetime.datetime.fromisoformat(s["used"]) > oldest
+            ]
+            mine = [s for s in live if s["key"] == key]
+            if not mine and len(live) == len(sessions):
+                return None
+
+            session = max(mine, key=lambda s: s["used"], default=None)
+            self._write([s for s in live if s is not session])
+
+        return session["state"] if session else None
+
+    # Return a session to the store after use
+    def checkin(self, username, base_url, firs, state):
+        session = {
+            "key": self.key(username, base_url, firs),
+            "used": datetime.datetime.now(datetime.UTC).isoformat(),
+            "state": state,
+        }
+
+        with self.lock:
+            sessions = self._read()
+            sessions.append(session)
+            self._write(sessions)
@@ -0,0 +1,58 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Raw briefing snapshots. The PIB result pages are saved as gzipped JSON
+# along with the header text, date range and the time they were fetched.
+
+import datetime
+import gzip
+import json
+import os
+
+
+# -----------------------------------------------------------------------
+# Save PIB result pages (a list of HTML strings) to a timestamped snapshot
+# file in directory, returns the snapshot filename
+def save_snapshot(directory, pages, hdr, date_from, date_to):
+    created = datetime.datetime.now(datetime.UTC)
+    snapshot = {
+        "created": created.isoformat(),
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "header": hdr,
+        "pages": pages,
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, f"pib-{created:%Y%m%dT%H%M%SZ}.json.gz")
+    with gzip.open(filename, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+    return filename
+
+
+# -----------------------------------------------------------------------
+# Read snapshot file, dates and times are converted back to datetime
+# objects
+def read_snapshot(filename):
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+
+    snapshot["created"] = datetime.datetime.fromisoformat(snapshot["created"])
+    snapshot["date_from"] = datetime.date.fromisoformat(snapshot["date_from"])
+    snapshot["date_to"] = datetime.date.fromisoformat(snapshot["date_to"])
+    return snapshot
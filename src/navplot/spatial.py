@@ -0,0 +1,60 @@
+# Copyright 2026 Alan Sparrow
+#
+# This file is part of Navplot
+#
+# Navplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Navplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Navplot.  If not, see <http://www.gnu.org/licenses/>.
+
+# Spatial index of NOTAM areas. A grid of one degree cells, each listing
+# the NOTAMs whose circle's bounding box overlaps the cell.
+
+import collections
+import math
+
+# NOTAMs covering more cells than this aren't gridded, they are returned
+# by every query
+MAX_CELLS = 64
+
+
+class SpatialIndex:
+    def __init__(self, notams):
+        self.cells = collections.defaultdict(list)
+        self.large = []
+
+        for n in notams:
+            lat_min, lat_max, lon_min, lon_max = bounds(n.lat, n.lon, n.radius)
+            lats = range(math.floor(lat_min), math.floor(lat_max) + 1)
+            lons = range(math.floor(lon_min), math.floor(lon_max) + 1)
+
+            if len(lats) * len(lons) > MAX_CELLS:
+                self.large.append(n.id)
+            else:
+                for lat in lats:
+                    for lon in lons:
+                        self.cells[lat, lon].append(n.id)
+
+    # Set of ids of NOTAMs which may overlap the lat/lon box
+    def query(self, lat_min, lat_max, lon_min, lon_max):
+        found = set(self.large)
+        for lat in range(math.floor(lat_min), math.floor(lat_max) + 1):
+            for lon in range(math.floor(lon_min), math.floor(lon_max) + 1):
+                found.update(self.cells.get((lat, lon), ()))
+
+        return found
+
+
+# Bounding box of circle, radius in nm
+def bounds(lat, lon, radius):
+    dlat = radius / 60.0
+    dlon = dlat / max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 0.01)
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon